@@ -4,15 +4,35 @@ local/titles_extracted.csvからb_rawに対してc_valueの合計を集計し、
 b_ranking.csvとb_ranking.jsonを生成します。
 """
 
-import json
+import multiprocessing
+import os
+from collections.abc import Iterator
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 
 import pandas as pd
-from sudachipy import tokenizer, dictionary
+from sudachipy import tokenizer
 
+from book_title_ratio_analysis.json_io import write_rankings_json
+from book_title_ratio_analysis.sudachi_tokenizer import get_dictionary, get_tokenizer
 
-# Sudachi Tokenizerの初期化（短単位用）
-_TOKENIZER_OBJ = dictionary.Dictionary().create()
+
+# 名詞かどうかを品詞IDで判定するマッチャー（品詞タプルを毎回生成しない）
+# 辞書はインポート時ではなく初回の解析時に読み込み、ワーカープロセスでも1回だけ読み込む
+_NOUN_MATCHER = None
+
+# ユニークなa_rawがこの件数以上ある場合のみ、形態素解析をマルチプロセスで並列化する
+# （件数が少ないとプロセス起動と辞書ロードのコストの方が大きくなるため）
+_PARALLEL_THRESHOLD = 2000
+
+# titles_extracted.csvのうち集計に使う列とその型（型推論を省いて読み込みを速くする）
+_CSV_DTYPES = {
+    "title_raw": "str",
+    "a_raw": "str",
+    "b_raw": "str",
+    "c_value": "float64",
+}
 
 
 def extract_last_simple_noun(text: str) -> str:
@@ -34,19 +54,45 @@ def extract_last_simple_noun(text: str) -> str:
         return text
 
     # Aモード（短単位）で形態素解析
-    morphemes = _TOKENIZER_OBJ.tokenize(text, tokenizer.Tokenizer.SplitMode.A)
-    morpheme_list = list(morphemes)
-
-    if not morpheme_list:
-        return text
+    morphemes = get_tokenizer().tokenize(text, tokenizer.Tokenizer.SplitMode.A)
+    is_noun = _get_noun_matcher()
 
-    # 末尾から遡って最初に見つかった名詞を返す
-    for morpheme in reversed(morpheme_list):
-        if morpheme.part_of_speech()[0] == "名詞":
-            return morpheme.surface()
+    # 先頭から走査し、最後に見つかった名詞を保持する（リストへの変換を省く）
+    last_noun = None
+    for morpheme in morphemes:
+        if is_noun(morpheme):
+            last_noun = morpheme.surface()
 
     # 名詞が見つからない場合は元のテキストを返す
-    return text
+    return last_noun if last_noun is not None else text
+
+
+def _get_noun_matcher():
+    """このプロセスで使う名詞のマッチャーを取得する（初回呼び出し時に共有の辞書から作る）"""
+    global _NOUN_MATCHER
+    if _NOUN_MATCHER is None:
+        _NOUN_MATCHER = get_dictionary().pos_matcher(lambda pos: pos[0] == "名詞")
+    return _NOUN_MATCHER
+
+
+def normalize_unique_values(values: list[str]) -> dict[str, str]:
+    """ユニークな文字列ごとに末尾の単純名詞を抽出し、対応表を返す
+
+    件数が _PARALLEL_THRESHOLD 以上の場合はCPUコア数分のプロセスで並列に解析する。
+    各ワーカーは最初の解析時に共有のトークナイザーを通して辞書を1回だけ読み込む。
+
+    Args:
+        values: 正規化対象のユニークな文字列のリスト
+
+    Returns:
+        元の文字列 -> 末尾の単純名詞 の辞書
+    """
+    if len(values) < _PARALLEL_THRESHOLD:
+        return {value: extract_last_simple_noun(value) for value in values}
+
+    with multiprocessing.Pool(os.cpu_count()) as pool:
+        results = pool.map(extract_last_simple_noun, values, chunksize=256)
+    return dict(zip(values, results))
 
 
 def build_b_ranking_csv(extracted: pd.DataFrame) -> pd.DataFrame:
@@ -60,18 +106,23 @@ def build_b_ranking_csv(extracted: pd.DataFrame) -> pd.DataFrame:
     if len(df) == 0:
         return pd.DataFrame(columns=["b_raw", "c_sum", "n", "examples"])
 
+    # 重複の多い文字列列はカテゴリ型にして、groupbyを整数コードで行う
+    df["b_raw"] = df["b_raw"].astype("category")
+
     # b_rawごとに集計
     agg = (
-        df.groupby("b_raw")
+        df.groupby("b_raw", observed=True)
         .agg(c_sum=("c_value", "sum"), n=("c_value", "count"))
         .sort_values(["c_sum", "n"], ascending=[False, False])
         .reset_index()
     )
 
     # 代表タイトル（上位3件）
+    # 先にgroupby.headで各グループ3件に絞ってから結合する
+    top3 = df.groupby("b_raw", observed=True).head(3)
     examples = (
-        df.groupby("b_raw")["title_raw"]
-        .apply(lambda s: " / ".join(list(s.head(3))))
+        top3.groupby("b_raw", observed=True)["title_raw"]
+        .agg(" / ".join)
         .reset_index()
         .rename(columns={"title_raw": "examples"})
     )
@@ -80,71 +131,87 @@ def build_b_ranking_csv(extracted: pd.DataFrame) -> pd.DataFrame:
     return agg
 
 
-def build_b_ranking_json(extracted: pd.DataFrame) -> dict:
-    """b_rawごとにa_rawの内訳も含めたランキングJSON（詳細版）"""
+def iter_b_rankings(extracted: pd.DataFrame) -> Iterator[dict]:
+    """b_rawごとのランキング項目（a_rawの内訳つき）をc_sumの大きい順に1件ずつ返す"""
     if len(extracted) == 0:
-        return {
-            "rankings": [],
-            "metadata": {
-                "total_titles": 0,
-                "total_b_categories": 0,
-                "generated_at": datetime.now().isoformat(),
-            },
-        }
+        return
 
     # b_rawとa_rawがあるものだけを使用
     df = extracted.dropna(subset=["b_raw", "a_raw", "c_value"]).copy()
 
     if len(df) == 0:
-        return {
-            "rankings": [],
-            "metadata": {
-                "total_titles": len(extracted),
-                "total_b_categories": 0,
-                "generated_at": datetime.now().isoformat(),
-            },
-        }
+        return
 
     # a_rawを正規化（末尾の単純名詞のみを抽出）
-    df["a_normalized"] = df["a_raw"].apply(extract_last_simple_noun)
+    # 同じa_rawを何度も形態素解析しないよう、ユニークな値だけ解析してから対応付ける
+    normalized_map = normalize_unique_values(df["a_raw"].unique().tolist())
+    df["a_normalized"] = df["a_raw"].map(normalized_map)
+
+    # 重複の多い文字列列はカテゴリ型にして、groupbyを整数コードで行う
+    df["b_raw"] = df["b_raw"].astype("category")
+    df["a_normalized"] = df["a_normalized"].astype("category")
+
+    # (b, a)の組ごとに一度だけ集計する（正規化されたa_normalizedを使用）
+    grouped = df.groupby(["b_raw", "a_normalized"], observed=True).agg(
+        c_sum=("c_value", "sum"),
+        count=("c_value", "count"),
+        titles=("title_raw", list),
+    )
+    b_totals = (
+        grouped.groupby(level="b_raw", observed=True)
+        .agg(c_sum=("c_sum", "sum"), count=("count", "sum"))
+        .sort_values("c_sum", ascending=False, kind="stable")
+    )
 
-    # bごとに集計
-    rankings = []
-    for b_val in (
-        df.groupby("b_raw")["c_value"].sum().sort_values(ascending=False).index
+    # bの順位とbごとのc_sumで一度だけ並べ替え、aの内訳をその順のまま組み立てる
+    b_rank = pd.Series(range(len(b_totals)), index=b_totals.index)
+    grouped["b_rank"] = b_rank.reindex(
+        grouped.index.get_level_values("b_raw")
+    ).to_numpy()
+    grouped = grouped.sort_values(
+        ["b_rank", "c_sum"], ascending=[True, False], kind="stable"
+    )
+
+    rows = zip(
+        grouped.index.get_level_values("b_raw"),
+        grouped.index.get_level_values("a_normalized"),
+        grouped["c_sum"],
+        grouped["count"],
+        grouped["titles"],
+    )
+    b_rows = zip(b_totals.index, b_totals["c_sum"], b_totals["count"])
+
+    # bごとに集計（1件ずつ組み立てて返す）
+    for (b_val, b_c_sum, b_count), (_, a_rows) in zip(
+        b_rows, groupby(rows, key=itemgetter(0))
     ):
-        b_df = df[df["b_raw"] == b_val]
-        b_c_sum = float(b_df["c_value"].sum())
-        b_count = len(b_df)
-
-        # aごとに集計（正規化されたa_normalizedを使用）
-        a_breakdown = []
-        for a_val in (
-            b_df.groupby("a_normalized")["c_value"]
-            .sum()
-            .sort_values(ascending=False)
-            .index
-        ):
-            a_df = b_df[b_df["a_normalized"] == a_val]
-            a_c_sum = float(a_df["c_value"].sum())
-            a_count = len(a_df)
-            titles = a_df["title_raw"].tolist()
-
-            a_breakdown.append(
-                {"a": a_val, "c_sum": a_c_sum, "count": a_count, "titles": titles}
-            )
-
-        rankings.append(
-            {"b": b_val, "c_sum": b_c_sum, "count": b_count, "a_breakdown": a_breakdown}
-        )
+        a_breakdown = [
+            {"a": a_val, "c_sum": float(c_sum), "count": int(count), "titles": titles}
+            for _, a_val, c_sum, count, titles in a_rows
+        ]
+        yield {
+            "b": b_val,
+            "c_sum": float(b_c_sum),
+            "count": int(b_count),
+            "a_breakdown": a_breakdown,
+        }
+
+
+def _build_metadata(total_titles: int, total_b_categories: int) -> dict:
+    """ランキングJSONのメタデータを作成する"""
+    return {
+        "total_titles": total_titles,
+        "total_b_categories": total_b_categories,
+        "generated_at": datetime.now().isoformat(),
+    }
 
+
+def build_b_ranking_json(extracted: pd.DataFrame) -> dict:
+    """b_rawごとにa_rawの内訳も含めたランキングJSON（詳細版）"""
+    rankings = list(iter_b_rankings(extracted))
     return {
         "rankings": rankings,
-        "metadata": {
-            "total_titles": len(extracted),
-            "total_b_categories": len(rankings),
-            "generated_at": datetime.now().isoformat(),
-        },
+        "metadata": _build_metadata(len(extracted), len(rankings)),
     }
 
 
@@ -156,7 +223,12 @@ def main():
     # titles_extracted.csvを読み込み
     csv_path = "local/titles_extracted.csv"
     try:
-        extracted = pd.read_csv(csv_path, encoding="utf-8-sig")
+        extracted = pd.read_csv(
+            csv_path,
+            encoding="utf-8-sig",
+            usecols=list(_CSV_DTYPES),
+            dtype=_CSV_DTYPES,
+        )
         print(f"✓ {len(extracted)}件のタイトルを読み込みました")
     except FileNotFoundError:
         print(f"❌ {csv_path} が見つかりません")
@@ -169,10 +241,13 @@ def main():
     print(f"✓ {csv_output} を保存しました")
 
     # JSON形式のランキングを作成
-    b_ranking_json = build_b_ranking_json(extracted)
+    # 全体を一度に組み立てず、bごとの項目を1件ずつ書き出す
     json_output = "local/b_ranking.json"
-    with open(json_output, "w", encoding="utf-8") as f:
-        json.dump(b_ranking_json, f, ensure_ascii=False, indent=2)
+    write_rankings_json(
+        json_output,
+        iter_b_rankings(extracted),
+        lambda total_b: _build_metadata(len(extracted), total_b),
+    )
     print(f"✓ {json_output} を保存しました")
 
     # プレビュー表示
@@ -1,22 +1,33 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
 
-matplotlib.rcParams["font.family"] = "Arial Unicode MS"  # 日本語対応
+matplotlib.use("Agg")  # 画像保存のみなので非対話バックエンドを使う
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib import font_manager  # noqa: E402
+
+# 日本語対応フォントを設定する
+# 見つからない場合はフォントの再探索を避けるため、同梱のDejaVu Sansを使う
+try:
+    font_manager.findfont("Arial Unicode MS", fallback_to_default=False)
+    matplotlib.rcParams["font.family"] = "Arial Unicode MS"
+except ValueError:
+    matplotlib.rcParams["font.family"] = "DejaVu Sans"
 
 # CSVファイルを読み込む
 df = pd.read_csv("local/titles_extracted.csv")
 
+# c_valueは0〜10の整数なので、bincountで一度だけ数えてヒストグラムと分布の両方に使う
+c_values = df["c_value"].dropna().to_numpy().astype(np.int64)
+counts = np.bincount(c_values.clip(0, 10), minlength=11)
+
 # c_value列のヒストグラムを作成
 plt.figure(figsize=(10, 6))
-# 整数を棒の真ん中に配置するため、binsを0.5刻みで設定
-bins = [i + 0.5 for i in range(-1, 10)]  # [-0.5, 0.5, 1.5, ..., 9.5]
-n, bins_edges, patches = plt.hist(
-    df["c_value"], bins=bins, edgecolor="black", alpha=0.7
-)
+# 整数ごとに棒の真ん中が来るよう、幅1の棒グラフとして描画
+plt.bar(range(11), counts, width=1.0, edgecolor="black", alpha=0.7)
 
 # 各棒の上に数値を表示
-for i, count in enumerate(n):
+for i, count in enumerate(counts):
     if count > 0:  # 0の場合は表示しない
         plt.text(i, count, str(int(count)), ha="center", va="bottom", fontsize=10)
 
@@ -38,6 +49,6 @@ print(f"c_valueの範囲: {df['c_value'].min()} - {df['c_value'].max()}")
 print(f"平均値: {df['c_value'].mean():.2f}")
 print(f"中央値: {df['c_value'].median():.2f}")
 print("\nc_valueの分布:")
-print(df["c_value"].value_counts().sort_index())
-
-plt.show()
+for c, count in enumerate(counts):
+    if count > 0:
+        print(f"{c}: {count}")
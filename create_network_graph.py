@@ -5,37 +5,13 @@
 CSVファイルからデータを読み込み、正規化して有向グラフを作成します。
 """
 
-import csv
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
-from book_title_ratio_analysis.network_graph import aggregate_normalized_data
-
-
-def load_csv_data(csv_path: Path) -> list[dict]:
-    """
-    CSVファイルからデータを読み込む
-
-    Args:
-        csv_path: CSVファイルのパス
-
-    Returns:
-        a_raw, b_raw, c_valueを含む辞書のリスト
-    """
-    data = []
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            data.append(
-                {
-                    "a_raw": row["a_raw"],
-                    "b_raw": row["b_raw"],
-                    "c_value": float(row["c_value"]),
-                }
-            )
-    return data
+from book_title_ratio_analysis.network_graph import load_or_aggregate
 
 
 def create_network_graph(
@@ -52,18 +28,21 @@ def create_network_graph(
     plt.rcParams["font.sans-serif"] = ["Hiragino Sans", "Hiragino Kaku Gothic ProN", "Arial Unicode MS"]
     plt.rcParams["axes.unicode_minus"] = False
 
-    # グラフの作成（c_valueが5以上のエッジのみ）
+    # グラフの作成（c_valueが5以上のエッジのみを先に絞り込んでからまとめて追加）
     G = nx.DiGraph()
-
-    for (a, b), weight in aggregated_data.items():
-        if weight >= 5.0:
-            G.add_edge(a, b, weight=weight)
+    G.add_weighted_edges_from(
+        (a, b, weight) for (a, b), weight in aggregated_data.items() if weight >= 5.0
+    )
 
     # 小さな孤立コンポーネント（2ノード以下）を除去
-    weak_components = list(nx.weakly_connected_components(G))
-    small_components = [comp for comp in weak_components if len(comp) <= 2]
-    for comp in small_components:
-        G.remove_nodes_from(comp)
+    G.remove_nodes_from(
+        [
+            node
+            for comp in nx.weakly_connected_components(G)
+            if len(comp) <= 2
+            for node in comp
+        ]
+    )
 
     # 可視化の設定
     plt.figure(figsize=(16, 12))
@@ -72,11 +51,13 @@ def create_network_graph(
     pos = nx.spring_layout(G, k=0.4, iterations=100, seed=42)
 
     # エッジの太さを重みに応じて設定
-    edges = G.edges()
-    weights = [G[u][v]["weight"] for u, v in edges]
-    max_weight = max(weights) if weights else 1
+    edges = list(G.edges())
+    weights = np.fromiter(
+        (G[u][v]["weight"] for u, v in edges), dtype=np.float64, count=len(edges)
+    )
+    max_weight = weights.max() if len(weights) else 1
     # 重みを1〜10の範囲に正規化
-    normalized_widths = [1 + (w / max_weight) * 9 for w in weights]
+    normalized_widths = 1 + (weights / max_weight) * 9
 
     # aに由来するノード（エッジの始点として出現）を特定
     a_nodes = set(u for u, v in G.edges())
@@ -103,12 +84,19 @@ def create_network_graph(
     )
 
     # エッジラベル（重み）の描画
+    labels = [f"{int(w)}割" for w in weights]
+    is_large = weights >= 10
+
     # 10割以上のラベル（大きいフォント）
-    edge_labels_large = {(u, v): f"{int(w)}割" for u, v, w in G.edges(data="weight") if w >= 10}
+    edge_labels_large = {
+        edge: label for edge, label, large in zip(edges, labels, is_large) if large
+    }
     nx.draw_networkx_edge_labels(G, pos, edge_labels_large, font_size=16)
 
     # 9割以下のラベル（小さいフォント）
-    edge_labels_small = {(u, v): f"{int(w)}割" for u, v, w in G.edges(data="weight") if w < 10}
+    edge_labels_small = {
+        edge: label for edge, label, large in zip(edges, labels, is_large) if not large
+    }
     nx.draw_networkx_edge_labels(G, pos, edge_labels_small, font_size=8)
 
     plt.title("「aはbがc割」系書籍タイトルにおけるaとbの関係性ネットワーク（正規化版）", fontsize=16, pad=20)
@@ -133,13 +121,8 @@ def main():
     output_path = Path("local/network_graph.png")
 
     # データの読み込み
-    print("CSVファイルを読み込んでいます...")
-    data = load_csv_data(csv_path)
-    print(f"読み込んだデータ数: {len(data)}")
-
-    # データの正規化と集計
-    print("データを正規化して集計しています...")
-    aggregated_data = aggregate_normalized_data(data)
+    print(f"CSVファイルを正規化して集計しています（キャッシュがあれば使います）: {csv_path}")
+    aggregated_data = load_or_aggregate(csv_path)
     print(f"集計後のエッジ数: {len(aggregated_data)}")
 
     # ネットワークグラフの作成
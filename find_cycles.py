@@ -6,38 +6,18 @@ CSVファイルからデータを読み込み、正規化して有向グラフ
 循環するパスを検出して可視化します。
 """
 
-import csv
 from collections import defaultdict
 from pathlib import Path
+from typing import Optional
 
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
-from book_title_ratio_analysis.network_graph import aggregate_normalized_data
+from book_title_ratio_analysis.network_graph import load_or_aggregate
 
-
-def load_csv_data(csv_path: Path) -> list[dict]:
-    """
-    CSVファイルからデータを読み込む
-
-    Args:
-        csv_path: CSVファイルのパス
-
-    Returns:
-        a_raw, b_raw, c_valueを含む辞書のリスト
-    """
-    data = []
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            data.append(
-                {
-                    "a_raw": row["a_raw"],
-                    "b_raw": row["b_raw"],
-                    "c_value": float(row["c_value"]),
-                }
-            )
-    return data
+# main()で検出する循環の最大長（ノード数）。これより長い循環は図で読み取れないため探索しない
+CYCLE_LENGTH_BOUND = 6
 
 
 def build_graph(aggregated_data: dict[tuple[str, str], float]) -> nx.DiGraph:
@@ -51,24 +31,38 @@ def build_graph(aggregated_data: dict[tuple[str, str], float]) -> nx.DiGraph:
         有向グラフ
     """
     G = nx.DiGraph()
-    for (a, b), weight in aggregated_data.items():
-        G.add_edge(a, b, weight=weight)
+    G.add_weighted_edges_from(
+        (a, b, weight) for (a, b), weight in aggregated_data.items()
+    )
     return G
 
 
-def find_all_cycles(G: nx.DiGraph) -> list[list[str]]:
+def find_all_cycles(
+    G: nx.DiGraph, length_bound: Optional[int] = None
+) -> list[list[str]]:
     """
-    有向グラフからすべての単純循環を検出する
+    有向グラフから単純循環を検出する
+
+    循環は強連結成分の中にしか存在しないため、強連結成分ごとに探索する
+    （自己ループのない1ノードの成分は探索しない）。
 
     Args:
         G: 有向グラフ
+        length_bound: 検出する循環の最大長（ノード数）。デフォルトのNoneでは上限を設けず、
+            すべての循環を検出する。密なグラフで探索を打ち切りたい場合に指定する
 
     Returns:
         循環のリスト（各循環はノードのリスト）
     """
     try:
-        # networkxのsimple_cyclesを使用
-        cycles = list(nx.simple_cycles(G))
+        cycles = []
+        for component in nx.strongly_connected_components(G):
+            if len(component) == 1:
+                (node,) = component
+                if not G.has_edge(node, node):
+                    continue
+            subgraph = G.subgraph(component)
+            cycles.extend(nx.simple_cycles(subgraph, length_bound=length_bound))
         return cycles
     except Exception as e:
         print(f"循環検出中にエラー: {e}")
@@ -121,23 +115,25 @@ def visualize_cycles(
     pos = nx.spring_layout(subgraph, k=2, iterations=100, seed=42)
 
     # エッジの太さを重みに応じて設定
-    edges = subgraph.edges()
-    weights = [subgraph[u][v]["weight"] for u, v in edges]
-    max_weight = max(weights) if weights else 1
+    edges = list(subgraph.edges())
+    weights = np.fromiter(
+        (subgraph[u][v]["weight"] for u, v in edges),
+        dtype=np.float64,
+        count=len(edges),
+    )
+    max_weight = weights.max() if len(weights) else 1
     # 重みを2〜8の範囲に正規化
-    normalized_widths = [2 + (w / max_weight) * 6 for w in weights]
+    normalized_widths = 2 + (weights / max_weight) * 6
 
-    # 循環に含まれるエッジとそうでないエッジを分ける
-    cycle_edge_list = [(u, v) for u, v in edges if (u, v) in cycle_edges]
-    non_cycle_edge_list = [(u, v) for u, v in edges if (u, v) not in cycle_edges]
+    # 循環に含まれるエッジとそうでないエッジを一度の走査で判定し、マスクで分ける
+    in_cycle = np.fromiter(
+        (edge in cycle_edges for edge in edges), dtype=bool, count=len(edges)
+    )
+    cycle_edge_list = [edges[i] for i in np.flatnonzero(in_cycle)]
+    non_cycle_edge_list = [edges[i] for i in np.flatnonzero(~in_cycle)]
 
-    cycle_edge_widths = [
-        2 + (subgraph[u][v]["weight"] / max_weight) * 6 for u, v in cycle_edge_list
-    ]
-    non_cycle_edge_widths = [
-        2 + (subgraph[u][v]["weight"] / max_weight) * 6
-        for u, v in non_cycle_edge_list
-    ]
+    cycle_edge_widths = normalized_widths[in_cycle].tolist()
+    non_cycle_edge_widths = normalized_widths[~in_cycle].tolist()
 
     # ノードの描画（すべて同じ色）
     nx.draw_networkx_nodes(
@@ -178,9 +174,7 @@ def visualize_cycles(
     nx.draw_networkx_labels(subgraph, pos, font_size=11, font_weight="bold")
 
     # エッジの重みをラベルとして表示
-    edge_labels = {
-        (u, v): f"{subgraph[u][v]['weight']:.1f}" for u, v in subgraph.edges()
-    }
+    edge_labels = {edge: f"{w:.1f}" for edge, w in zip(edges, weights)}
     nx.draw_networkx_edge_labels(
         subgraph, pos, edge_labels, font_size=8, label_pos=0.3
     )
@@ -233,20 +227,16 @@ def main():
     output_path = Path("local/charts/cycles_graph.png")
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    print(f"CSVファイルを読み込んでいます: {csv_path}")
-    data = load_csv_data(csv_path)
-    print(f"読み込み完了: {len(data)}件のデータ")
-
-    print("\nデータを正規化して集計しています...")
-    aggregated_data = aggregate_normalized_data(data)
+    print(f"CSVファイルを正規化して集計しています（キャッシュがあれば使います）: {csv_path}")
+    aggregated_data = load_or_aggregate(csv_path)
     print(f"集計完了: {len(aggregated_data)}個のユニークなエッジ")
 
     print("\n有向グラフを構築しています...")
     G = build_graph(aggregated_data)
     print(f"グラフ構築完了: {G.number_of_nodes()}個のノード, {G.number_of_edges()}個のエッジ")
 
-    print("\n循環を検出しています...")
-    cycles = find_all_cycles(G)
+    print(f"\n循環を検出しています（長さ{CYCLE_LENGTH_BOUND}以下）...")
+    cycles = find_all_cycles(G, length_bound=CYCLE_LENGTH_BOUND)
 
     if cycles:
         # 循環の詳細を出力
@@ -6,38 +6,15 @@ CSVファイルからデータを読み込み、正規化して有向グラフ
 長いパス（依存関係の連鎖）を検出して可視化します。
 """
 
-import csv
 from collections import defaultdict
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import networkx as nx
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.patches import FancyBboxPatch
 
-from book_title_ratio_analysis.network_graph import aggregate_normalized_data
-
-
-def load_csv_data(csv_path: Path) -> list[dict]:
-    """
-    CSVファイルからデータを読み込む
-
-    Args:
-        csv_path: CSVファイルのパス
-
-    Returns:
-        a_raw, b_raw, c_valueを含む辞書のリスト
-    """
-    data = []
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            data.append(
-                {
-                    "a_raw": row["a_raw"],
-                    "b_raw": row["b_raw"],
-                    "c_value": float(row["c_value"]),
-                }
-            )
-    return data
+from book_title_ratio_analysis.network_graph import load_or_aggregate
 
 
 def build_graph(aggregated_data: dict[tuple[str, str], float]) -> nx.DiGraph:
@@ -51,8 +28,9 @@ def build_graph(aggregated_data: dict[tuple[str, str], float]) -> nx.DiGraph:
         有向グラフ
     """
     G = nx.DiGraph()
-    for (a, b), weight in aggregated_data.items():
-        G.add_edge(a, b, weight=weight)
+    G.add_weighted_edges_from(
+        (a, b, weight) for (a, b), weight in aggregated_data.items()
+    )
     return G
 
 
@@ -67,8 +45,26 @@ def find_longest_path(G: nx.DiGraph) -> list[str]:
         最長パスのノードリスト
     """
     try:
-        # DAGの最長パスを検出
-        longest_path = nx.dag_longest_path(G)
+        # トポロジカル順の逆から、各ノードを始点とする最長パスの重み合計と次のノードを求める
+        order = list(nx.topological_sort(G))
+        if not order:
+            return []
+
+        dist = dict.fromkeys(order, 0.0)
+        next_node = {}
+        for u in reversed(order):
+            for v, attr in G.adj[u].items():
+                length = dist[v] + attr.get("weight", 1)
+                if length > dist[u]:
+                    dist[u] = length
+                    next_node[u] = v
+
+        # 最長パスの始点から次のノードをたどって経路を復元
+        node = max(order, key=dist.__getitem__)
+        longest_path = [node]
+        while node in next_node:
+            node = next_node[node]
+            longest_path.append(node)
         return longest_path
     except Exception as e:
         print(f"最長パス検出中にエラー: {e}")
@@ -86,38 +82,36 @@ def find_all_long_paths(G: nx.DiGraph, min_length: int = 3) -> list[list[str]]:
     Returns:
         長いパスのリスト
     """
-    long_paths = []
-
-    # すべてのノードペアについて単純パスを探索
-    nodes = list(G.nodes())
-
-    for source in nodes:
-        for target in nodes:
-            if source == target:
+    # パスは見つけた時点で長さごとのバケットに振り分け、最後にソートせずに長い順に並べる
+    paths_by_length = defaultdict(list)
+
+    # 始点ごとに1回だけ深さ優先探索し、たどった経路をすべてパスとして出力する
+    # （始点から到達できるすべての終点へのパスが一度の探索で列挙され、同じパスは二度出力されない）
+    for source in G:
+        # 挿入順を保つdictで、経路の復元とO(1)の訪問判定を兼ねる
+        visited = dict.fromkeys([source])
+        stack = [iter(G[source])]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                # 行き止まりまで探索したら1つ戻る
+                stack.pop()
+                visited.popitem()
                 continue
-
-            try:
-                # sourceからtargetへのすべての単純パスを検出
-                paths = list(nx.all_simple_paths(G, source, target))
-                for path in paths:
-                    if len(path) >= min_length:
-                        long_paths.append(path)
-            except nx.NetworkXNoPath:
+            if child in visited:
                 continue
 
-    # 重複を削除（パスを文字列化して比較）
-    unique_paths = []
-    seen = set()
-    for path in long_paths:
-        path_str = "->".join(path)
-        if path_str not in seen:
-            seen.add(path_str)
-            unique_paths.append(path)
-
-    # 長さでソート（長い順）
-    unique_paths.sort(key=len, reverse=True)
+            visited[child] = None
+            if len(visited) >= min_length:
+                paths_by_length[len(visited)].append(list(visited))
+            stack.append(iter(G[child]))
 
-    return unique_paths
+    # 長い順に連結（同じ長さのパスは見つけた順のまま）
+    return [
+        path
+        for length in sorted(paths_by_length, reverse=True)
+        for path in paths_by_length[length]
+    ]
 
 
 def visualize_long_paths(
@@ -153,6 +147,11 @@ def visualize_long_paths(
     # 図のサイズを設定（横長）
     fig, ax = plt.subplots(figsize=(max_path_length * 3.5, max_paths * 1.2 + 1))
 
+    # ボックスと矢印はまとめてコレクションとして描画するため、先に座標を集める
+    boxes = []
+    arrow_segments = []
+    arrow_heads = []
+
     # 各パスを描画
     for path_idx, path in enumerate(vis_paths):
         y_position = max_paths - path_idx  # 上から順に描画
@@ -169,19 +168,19 @@ def visualize_long_paths(
             else:
                 color = "lightyellow"  # 中間ノード
 
-            # ボックスを描画
-            from matplotlib.patches import FancyBboxPatch
-            box = FancyBboxPatch(
-                (x_position - 0.8, y_position - 0.3),
-                1.6,
-                0.6,
-                boxstyle="round,pad=0.05",
-                facecolor=color,
-                edgecolor="black",
-                linewidth=2,
-                alpha=0.9,
+            # ボックス
+            boxes.append(
+                FancyBboxPatch(
+                    (x_position - 0.8, y_position - 0.3),
+                    1.6,
+                    0.6,
+                    boxstyle="round,pad=0.05",
+                    facecolor=color,
+                    edgecolor="black",
+                    linewidth=2,
+                    alpha=0.9,
+                )
             )
-            ax.add_patch(box)
 
             # ノード名を描画
             ax.text(
@@ -195,26 +194,17 @@ def visualize_long_paths(
                 wrap=True,
             )
 
-            # 矢印を描画（最後のノード以外）
+            # 矢印（最後のノード以外）
             if node_idx < len(path) - 1:
                 next_node = path[node_idx + 1]
                 weight = G[node][next_node]["weight"]
 
-                # 矢印の描画
                 arrow_start_x = x_position + 0.8
                 arrow_end_x = x_position + 3 - 0.8
-
-                ax.annotate(
-                    "",
-                    xy=(arrow_end_x, y_position),
-                    xytext=(arrow_start_x, y_position),
-                    arrowprops=dict(
-                        arrowstyle="->",
-                        lw=2,
-                        color="darkblue",
-                        alpha=0.8,
-                    ),
+                arrow_segments.append(
+                    [(arrow_start_x, y_position), (arrow_end_x, y_position)]
                 )
+                arrow_heads.append((arrow_end_x, y_position))
 
                 # 重みを矢印の上に表示
                 ax.text(
@@ -228,6 +218,17 @@ def visualize_long_paths(
                     fontweight="bold",
                 )
 
+    # すべてのボックスを1つのコレクションで描画
+    ax.add_collection(PatchCollection(boxes, match_original=True))
+
+    # 矢印の軸を1つのコレクションで描画し、先端は三角マーカーでまとめて描く
+    if arrow_segments:
+        ax.add_collection(
+            LineCollection(arrow_segments, colors="darkblue", linewidths=2, alpha=0.8)
+        )
+        head_x, head_y = zip(*arrow_heads)
+        ax.scatter(head_x, head_y, marker=">", s=60, color="darkblue", alpha=0.8)
+
     # 軸の設定
     ax.set_xlim(-0.5, max_path_length * 3 + 0.5)
     ax.set_ylim(0.3, max_paths + 0.7)
@@ -295,12 +296,8 @@ def main():
     # 可視化する最大パス数
     max_vis_paths = 15
 
-    print(f"CSVファイルを読み込んでいます: {csv_path}")
-    data = load_csv_data(csv_path)
-    print(f"読み込み完了: {len(data)}件のデータ")
-
-    print("\nデータを正規化して集計しています...")
-    aggregated_data = aggregate_normalized_data(data)
+    print(f"CSVファイルを正規化して集計しています（キャッシュがあれば使います）: {csv_path}")
+    aggregated_data = load_or_aggregate(csv_path)
     print(f"集計完了: {len(aggregated_data)}個のユニークなエッジ")
 
     print("\n有向グラフを構築しています...")
@@ -1,14 +1,19 @@
 import re
 import sys
-import time
 import math
 import html
 import os
 import json
 from datetime import datetime
+from io import BytesIO
+from operator import itemgetter
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from book_title_ratio_analysis.rate_limiter import RateLimiter
 from book_title_ratio_analysis.title_parser import parse_ratio_title
 
 # -----------------------------
@@ -17,39 +22,53 @@ from book_title_ratio_analysis.title_parser import parse_ratio_title
 # dpid=iss-ndl-opac で国会図書館蔵書（主に図書）に限定
 # 助詞（の/が/は）を必須にしてパターンマッチ精度UP
 # NDLサーチは全角・半角数字を正規化するが、漢数字は別扱い
-QUERIES = [
-    # 「が」パターン（「aはbがc」形式）- 半角数字
-    'title="が1割" AND dpid=iss-ndl-opac',
-    'title="が2割" AND dpid=iss-ndl-opac',
-    'title="が3割" AND dpid=iss-ndl-opac',
-    'title="が4割" AND dpid=iss-ndl-opac',
-    'title="が5割" AND dpid=iss-ndl-opac',
-    'title="が6割" AND dpid=iss-ndl-opac',
-    'title="が7割" AND dpid=iss-ndl-opac',
-    'title="が8割" AND dpid=iss-ndl-opac',
-    'title="が9割" AND dpid=iss-ndl-opac',
-    # 漢数字
-    'title="が一割" AND dpid=iss-ndl-opac',
-    'title="が二割" AND dpid=iss-ndl-opac',
-    'title="が三割" AND dpid=iss-ndl-opac',
-    'title="が四割" AND dpid=iss-ndl-opac',
-    'title="が五割" AND dpid=iss-ndl-opac',
-    'title="が六割" AND dpid=iss-ndl-opac',
-    'title="が七割" AND dpid=iss-ndl-opac',
-    'title="が八割" AND dpid=iss-ndl-opac',
-    'title="が九割" AND dpid=iss-ndl-opac',
-]
+# 半角数字と漢数字のそれぞれについて「がc割」を検索する
+_DIGITS = "123456789" + "一二三四五六七八九"
+QUERIES = [f'title="が{d}割" AND dpid=iss-ndl-opac' for d in _DIGITS]
 
 SRU_ENDPOINT = "https://ndlsearch.ndl.go.jp/api/sru"  # 公式例でもこのエンドポイントが提示されています  [oai_citation:2‡国立国会図書館サーチ（NDLサーチ）](https://ndlsearch.ndl.go.jp/help/api/specifications)
 
 # 控えめに（大量アクセスは注意喚起あり） [oai_citation:3‡国立国会図書館サーチ（NDLサーチ）](https://iss.ndl.go.jp/information/api/)
+# リクエストの開始間隔はSLEEP_SEC以上に保ったまま、最大MAX_WORKERS件を並列に待つ
 SLEEP_SEC = 0.25
+MAX_WORKERS = 4
+
+# 全リクエストで接続を使い回すセッション（一時的なエラーは指数バックオフで再試行）
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=MAX_WORKERS,
+        pool_maxsize=MAX_WORKERS,
+        # 再試行し尽くした場合も最後のレスポンスを返し、raise_for_status()でHTTPErrorにする
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
 
 
 # -----------------------------
 # 2) SRUでタイトルを集める
 # -----------------------------
-def sru_search(query: str, start_record: int = 1, maximum_records: int = 50) -> str:
+# 名前空間（SRU/DCなど）
+SRU_NS = {
+    "srw": "http://www.loc.gov/zing/srw/",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+
+_SRW_RECORD = f"{{{SRU_NS['srw']}}}record"
+_SRW_NUMBER_OF_RECORDS = f"{{{SRU_NS['srw']}}}numberOfRecords"
+
+# recordDataがXMLとしてパースできない場合に使う
+_DC_TITLE_RE = re.compile(r"<dc:title>(.+?)</dc:title>")
+_DC_IDENTIFIER_RE = re.compile(r"<dc:identifier>(.+?)</dc:identifier>")
+
+
+def sru_search(query: str, start_record: int = 1, maximum_records: int = 50) -> bytes:
     """
     SRU searchRetrieve.
     例では operation=searchRetrieve&maximumRecords=10&query=title="桜" AND from="2018" といった形。 [oai_citation:4‡国立国会図書館サーチ（NDLサーチ）](https://ndlsearch.ndl.go.jp/help/api/specifications)
@@ -60,100 +79,143 @@ def sru_search(query: str, start_record: int = 1, maximum_records: int = 50) ->
         "startRecord": start_record,
         "maximumRecords": maximum_records,
     }
-    r = requests.get(SRU_ENDPOINT, params=params, timeout=30)
+    r = SESSION.get(SRU_ENDPOINT, params=params, timeout=30)
     r.raise_for_status()
-    return r.text
+    # デコードせずバイト列のままパーサーに渡す
+    return r.content
 
 
-def parse_sru(xml_text: str):
+def parse_sru(xml_bytes: bytes):
     """
     SRU XMLからタイトル等を抜く（DC-NDLベース）。 [oai_citation:5‡国立国会図書館サーチ（NDLサーチ）](https://ndlsearch.ndl.go.jp/help/api/specifications)
     フィールドはDPにより揺れるので、まずは title と identifier/link だけを堅牢に拾う。
+    ページ全体の木は作らず、recordを1件ずつ読んでは破棄する。
     """
-    root = ET.fromstring(xml_text)
-
-    # 名前空間（SRU/DCなど）
-    ns = {
-        "srw": "http://www.loc.gov/zing/srw/",
-    }
-
-    # total件数
-    n = root.findtext(".//srw:numberOfRecords", default="0", namespaces=ns)
-    total = int(n) if n.isdigit() else 0
-
+    total = None
     rows = []
-    for rec in root.findall(".//srw:record", ns):
-        # recordDataの中身を取得（エスケープされたXMLが入っている）
-        record_data = rec.findtext(".//srw:recordData", default="", namespaces=ns)
-
-        if not record_data:
-            continue
-
-        # HTMLエスケープを解除
-        unescaped = html.unescape(record_data)
-
-        # 正規表現でタイトルとidentifierを抽出（名前空間を考慮）
-        title_match = re.search(r"<dc:title>(.+?)</dc:title>", unescaped)
-        title = title_match.group(1) if title_match else None
-
-        # identifierも同様に抽出
-        id_match = re.search(r"<dc:identifier>(.+?)</dc:identifier>", unescaped)
-        identifier = id_match.group(1) if id_match else None
-
-        if title:  # タイトルがある場合のみ追加
-            # &amp; などのエンティティも解除
-            title = html.unescape(title)
-            rows.append(
-                {
-                    "source": "ndl_sru",
-                    "title_raw": title,
-                    "id_or_url": identifier,
-                }
+    for _, elem in ET.iterparse(BytesIO(xml_bytes), events=("end",)):
+        if elem.tag == _SRW_NUMBER_OF_RECORDS and total is None:
+            # total件数
+            n = elem.text or ""
+            total = int(n) if n.isdigit() else 0
+        elif elem.tag == _SRW_RECORD:
+            record_data = elem.find(".//srw:recordData", SRU_NS)
+            title, identifier = (
+                _parse_record_data(record_data)
+                if record_data is not None
+                else (None, None)
+            )
+            # 読み終えたrecordの中身は保持しない
+            elem.clear()
+
+            if title:  # タイトルがある場合のみ追加
+                # &amp; などのエンティティも解除
+                title = html.unescape(title)
+                rows.append(
+                    {
+                        "source": "ndl_sru",
+                        "title_raw": title,
+                        "id_or_url": identifier,
+                    }
+                )
+    return total or 0, rows
+
+
+def _parse_record_data(record_data: ET.Element):
+    """
+    recordDataから最初の dc:title と dc:identifier を取り出す。
+    中身がXML要素として入っている場合はそのまま、エスケープされたXML文字列の場合は
+    一度だけパースして、正規表現を使わずに要素を探す。
+    """
+    if len(record_data):
+        # recordPacking=xml の場合は子要素がそのまま入っている
+        record = record_data[0]
+    else:
+        # recordPacking=string の場合はエスケープされたXMLが入っている（既定）
+        if not record_data.text:
+            return None, None
+        try:
+            record = ET.fromstring(record_data.text)
+        except ET.ParseError:
+            # XMLとして壊れている場合はHTMLエスケープを解除して正規表現で拾う
+            unescaped = html.unescape(record_data.text)
+            title_match = _DC_TITLE_RE.search(unescaped)
+            id_match = _DC_IDENTIFIER_RE.search(unescaped)
+            return (
+                title_match.group(1) if title_match else None,
+                id_match.group(1) if id_match else None,
             )
-    return total, rows
+
+    return (
+        record.findtext(".//dc:title", namespaces=SRU_NS),
+        record.findtext(".//dc:identifier", namespaces=SRU_NS),
+    )
 
 
 def harvest_ndl(queries, per_page=50, max_pages=20, debug=False):
-    all_rows = []
-    for i, q in enumerate(queries, 1):
-        print(f"  [{i}/{len(queries)}] {q[:30]}...", end=" ", flush=True)
-        query_rows = []  # このクエリで取得した全行
+    limiter = RateLimiter(SLEEP_SEC)
 
-        # 1ページ目で総件数を知る
-        xml1 = sru_search(q, start_record=1, maximum_records=per_page)
+    def fetch(args):
+        q, start = args
+        limiter.wait()
+        return sru_search(q, start_record=start, maximum_records=per_page)
 
-        if debug and i == 1:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # 1ページ目で総件数を知る（全クエリ分をまとめて並列に取得）
+        first_pages = list(executor.map(fetch, [(q, 1) for q in queries]))
+
+        if debug and first_pages:
             # 最初のクエリの生XMLをファイルに保存
             os.makedirs("local", exist_ok=True)
-            with open("local/debug_response.xml", "w", encoding="utf-8") as f:
-                f.write(xml1)
-            print("\n✓ XMLレスポンスを local/debug_response.xml に保存")
-
-        total, rows = parse_sru(xml1)
-
-        if debug and i == 1:
-            print(f"  パース結果: {len(rows)}件のレコード")
-            if len(rows) > 0:
-                print(f"  サンプル: {rows[0]}")
-
-        query_rows.extend(rows)
-        time.sleep(SLEEP_SEC)
-
-        pages = min(max_pages, math.ceil(total / per_page))
-        for p in range(2, pages + 1):
-            start = (p - 1) * per_page + 1
-            xmlp = sru_search(q, start_record=start, maximum_records=per_page)
+            with open("local/debug_response.xml", "wb") as f:
+                f.write(first_pages[0])
+            print("✓ XMLレスポンスを local/debug_response.xml に保存")
+
+        totals = []
+        query_rows = []  # クエリごとに取得した全行
+        for i, xml1 in enumerate(first_pages, 1):
+            total, rows = parse_sru(xml1)
+
+            if debug and i == 1:
+                print(f"  パース結果: {len(rows)}件のレコード")
+                if len(rows) > 0:
+                    print(f"  サンプル: {rows[0]}")
+
+            totals.append(total)
+            query_rows.append(rows)
+
+        # 2ページ目以降は全クエリ分を1つのタスク列にして同じプールで取得する
+        tasks = []
+        for qi, (q, total) in enumerate(zip(queries, totals)):
+            pages = min(max_pages, math.ceil(total / per_page))
+            for p in range(2, pages + 1):
+                tasks.append((qi, (q, (p - 1) * per_page + 1)))
+
+        xml_pages = executor.map(fetch, [task for _, task in tasks])
+        for (qi, _), xmlp in zip(tasks, xml_pages):
             _, rows = parse_sru(xmlp)
-            query_rows.extend(rows)
-            time.sleep(SLEEP_SEC)
+            query_rows[qi].extend(rows)
+
+    all_rows = []
+    for i, (q, total, rows) in enumerate(zip(queries, totals, query_rows), 1):
+        all_rows.extend(rows)
+        print(f"  [{i}/{len(queries)}] {q[:30]}... → {len(rows)}件 (全{total}件中)")
 
-        all_rows.extend(query_rows)
-        print(f"→ {len(query_rows)}件 (全{total}件中)")
+    print(f"  生データ: {len(all_rows)}件")
 
-    df = pd.DataFrame(all_rows)
-    print(f"  生データ: {len(df)}件")
+    # DataFrameを作らず、タイトルのあるものを先頭から重複なしで残す
+    seen = set()
+    deduped = [
+        row
+        for row in all_rows
+        if row["title_raw"]
+        and row["title_raw"] not in seen
+        and not seen.add(row["title_raw"])
+    ]
+    if len(deduped) < len(all_rows):
+        print(f"  重複除去: {len(all_rows)}件 → {len(deduped)}件")
 
-    return df
+    return deduped
 
 
 # -----------------------------
@@ -161,10 +223,20 @@ def harvest_ndl(queries, per_page=50, max_pages=20, debug=False):
 # -----------------------------
 
 
-def build_rank(df: pd.DataFrame):
+def build_rank(df: pd.DataFrame | list[dict]):
+    """タイトルからa, b, cを抽出し、抽出結果とランキングを返す"""
+    out = parse_titles(df)
+    return out, rank_titles(out)
+
+
+def parse_titles(df: pd.DataFrame | list[dict]) -> pd.DataFrame:
+    """タイトルからa, b, cを抽出し、cが取れた行だけを返す
+
+    タイトルの重複はharvest_ndlで除いてあるので、ここでは除かない。
+    """
     if len(df) == 0:
         # 空のDataFrameの場合は空の結果を返す
-        empty_extracted = pd.DataFrame(
+        return pd.DataFrame(
             columns=[
                 "source",
                 "title_raw",
@@ -175,54 +247,49 @@ def build_rank(df: pd.DataFrame):
                 "b_raw",
             ]
         )
-        empty_ranking = pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
-        return empty_extracted, empty_ranking
-
-    out = df.copy()
-
-    # title_rawの重複を除去
-    original_count = len(out)
-    out = out.drop_duplicates(subset=["title_raw"]).reset_index(drop=True)
-    if len(out) < original_count:
-        print(f"  重複除去: {original_count}件 → {len(out)}件")
-
-    # parse_ratio_titleでa, b, cを抽出
-    result = out["title_raw"].map(parse_ratio_title)
-    out["a_raw"] = result.map(lambda x: x[0])
-    out["b_raw"] = result.map(lambda x: x[1])
-    out["c_value"] = result.map(lambda x: x[2])
+
+    # 収集結果（辞書のリスト）はここで初めてDataFrameにする
+    out = pd.DataFrame(df) if isinstance(df, list) else df.copy()
+
+    # タイトルを1回ずつ解析し、(a, b, c)のタプルをそのまま3列に展開する
+    # （「は」「が」「割」のどれかを含まないタイトルは、parse_ratio_titleが形態素解析をせずに除外する）
+    out["a_raw"], out["b_raw"], out["c_value"] = zip(
+        *(parse_ratio_title(title) for title in out["title_raw"])
+    )
     out["c_type"] = out["c_value"].map(lambda x: "wari" if x is not None else None)
 
     # パターンにマッチするもの（cが取れたもの）のみをフィルタリング
-    matched_count = out["c_value"].notna().sum()
-    print(f"  パターンマッチ: {matched_count}件 / {len(out)}件")
-    out = out[out["c_value"].notna()].reset_index(drop=True)
+    mask_c = out["c_value"].notna()
+    print(f"  パターンマッチ: {mask_c.sum()}件 / {len(out)}件")
+    return out.loc[mask_c].reset_index(drop=True)
+
+
+def rank_titles(extracted: pd.DataFrame) -> pd.DataFrame:
+    """抽出済みのa, b, cからaごとのランキングを作成する"""
+    empty_ranking = pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
+    if len(extracted) == 0:
+        return empty_ranking
 
     # ランキング（aが取れないタイトルもあるので、aがあるものを優先）
-    out_ab = out.dropna(subset=["a_raw"]).copy()
+    # groupbyは元のフレームを変更しないので、コピーせずに参照する
+    out_ab = extracted.loc[extracted["a_raw"].notna()]
 
     if len(out_ab) == 0:
         # a_rawが取れたものがない場合
-        empty_ranking = pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
-        return out, empty_ranking
+        return empty_ranking
 
+    # 集計と検算用の代表タイトル（上位3件）を1回のgroupbyでまとめて求める
     agg = (
         out_ab.groupby("a_raw")
-        .agg(c_sum=("c_value", "sum"), n=("c_value", "count"))
+        .agg(
+            c_sum=("c_value", "sum"),
+            n=("c_value", "count"),
+            examples=("title_raw", lambda s: " / ".join(s.iloc[:3])),
+        )
         .sort_values(["c_sum", "n"], ascending=[False, False])
         .reset_index()
     )
-
-    # 検算用の代表タイトル（上位3件）
-    examples = (
-        out_ab.groupby("a_raw")["title_raw"]
-        .apply(lambda s: " / ".join(list(s.head(3))))
-        .reset_index()
-        .rename(columns={"title_raw": "examples"})
-    )
-
-    agg = agg.merge(examples, on="a_raw", how="left")
-    return out, agg
+    return agg
 
 
 def build_ranking_json(extracted: pd.DataFrame):
@@ -250,32 +317,38 @@ def build_ranking_json(extracted: pd.DataFrame):
             },
         }
 
-    # aごとに集計
-    rankings = []
-    for a_val in (
-        df.groupby("a_raw")["c_value"].sum().sort_values(ascending=False).index
+    # (a, b)の組ごとに一度だけ集計し、aごとにbの内訳をまとめる
+    grouped = df.groupby(["a_raw", "b_raw"]).agg(
+        c_sum=("c_value", "sum"),
+        count=("c_value", "count"),
+        titles=("title_raw", list),
+    )
+    b_breakdowns: dict = {}
+    for (a_val, b_val), b_c_sum, b_count, titles in zip(
+        grouped.index, grouped["c_sum"], grouped["count"], grouped["titles"]
     ):
-        a_df = df[df["a_raw"] == a_val]
-        a_c_sum = float(a_df["c_value"].sum())
-        a_count = len(a_df)
-
-        # bごとに集計
-        b_breakdown = []
-        for b_val in (
-            a_df.groupby("b_raw")["c_value"].sum().sort_values(ascending=False).index
-        ):
-            b_df = a_df[a_df["b_raw"] == b_val]
-            b_c_sum = float(b_df["c_value"].sum())
-            b_count = len(b_df)
-            titles = b_df["title_raw"].tolist()
-
-            b_breakdown.append(
-                {"b": b_val, "c_sum": b_c_sum, "count": b_count, "titles": titles}
-            )
+        b_breakdowns.setdefault(a_val, []).append(
+            {
+                "b": b_val,
+                "c_sum": float(b_c_sum),
+                "count": int(b_count),
+                "titles": titles,
+            }
+        )
 
+    # aごと・bごとにc_sumの大きい順に並べる
+    rankings = []
+    for a_val, b_breakdown in b_breakdowns.items():
+        b_breakdown.sort(key=itemgetter("c_sum"), reverse=True)
         rankings.append(
-            {"a": a_val, "c_sum": a_c_sum, "count": a_count, "b_breakdown": b_breakdown}
+            {
+                "a": a_val,
+                "c_sum": sum(item["c_sum"] for item in b_breakdown),
+                "count": sum(item["count"] for item in b_breakdown),
+                "b_breakdown": b_breakdown,
+            }
         )
+    rankings.sort(key=itemgetter("c_sum"), reverse=True)
 
     return {
         "rankings": rankings,
@@ -299,6 +372,9 @@ def main():
         print("   （再取得する場合は --force オプションを指定してください）")
         extracted = pd.read_csv("local/titles_extracted.csv", encoding="utf-8-sig")
         print(f"✓ {len(extracted)}件のタイトルを読み込みました")
+
+        # 抽出済みのa, b, cがあるので、タイトルは再解析せずランキングだけを再計算
+        ranking = rank_titles(extracted)
     else:
         if force_fetch:
             print("🔄 --force オプションにより再取得します")
@@ -319,37 +395,21 @@ def main():
         )
         print("取得開始...")
 
-        df_titles = harvest_ndl(
+        title_rows = harvest_ndl(
             queries,
             per_page=per_page,
             max_pages=max_pages,
             debug=debug_mode or test_mode,
         )
-        print(f"✓ {len(df_titles)}件のタイトルを取得")
+        print(f"✓ {len(title_rows)}件のタイトルを取得")
 
-        extracted, ranking = build_rank(df_titles)
+        extracted, ranking = build_rank(title_rows)
         os.makedirs("local", exist_ok=True)
         extracted.to_csv(
             "local/titles_extracted.csv", index=False, encoding="utf-8-sig"
         )
         print("✓ local/titles_extracted.csvを保存しました")
 
-    # 既存ファイルを読み込んだ場合もランキングを再計算
-    if os.path.exists("local/titles_extracted.csv") and not force_fetch:
-        # extractedから直接ランキングを作成するため、元のDataFrameを再構築
-        df_for_ranking = (
-            extracted[["source", "title_raw", "id_or_url"]].copy()
-            if "source" in extracted.columns
-            else pd.DataFrame(
-                {
-                    "source": "ndl_sru",
-                    "title_raw": extracted["title_raw"],
-                    "id_or_url": extracted.get("id_or_url", None),
-                }
-            )
-        )
-        _, ranking = build_rank(df_for_ranking)
-
     os.makedirs("local", exist_ok=True)
     ranking.to_csv("local/a_ranking.csv", index=False, encoding="utf-8-sig")
 
@@ -9,44 +9,29 @@ Usage:
     uv run main_google_books.py --test   # 最小サンプルで動作確認
 """
 
-import json
 import os
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import itemgetter
 
 import pandas as pd
 
-from book_title_ratio_analysis.google_books_client import BookInfo, fetch_all_books
+from book_title_ratio_analysis.google_books_client import fetch_all_book_columns
+from book_title_ratio_analysis.json_io import write_json
+from book_title_ratio_analysis.rate_limiter import RateLimiter
 from book_title_ratio_analysis.title_parser import parse_ratio_title
 
 # -----------------------------
 # 1) クエリ一覧（intitleフレーズ検索）
 # -----------------------------
-QUERIES = [
-    # 半角数字
-    'intitle:"が1割"',
-    'intitle:"が2割"',
-    'intitle:"が3割"',
-    'intitle:"が4割"',
-    'intitle:"が5割"',
-    'intitle:"が6割"',
-    'intitle:"が7割"',
-    'intitle:"が8割"',
-    'intitle:"が9割"',
-    # 漢数字
-    'intitle:"が一割"',
-    'intitle:"が二割"',
-    'intitle:"が三割"',
-    'intitle:"が四割"',
-    'intitle:"が五割"',
-    'intitle:"が六割"',
-    'intitle:"が七割"',
-    'intitle:"が八割"',
-    'intitle:"が九割"',
-]
+# 半角数字と漢数字のそれぞれについて「がc割」を検索する
+_DIGITS = "123456789" + "一二三四五六七八九"
+QUERIES = [f'intitle:"が{d}割"' for d in _DIGITS]
 
+# クエリの開始間隔はSLEEP_SEC以上に保ったまま、最大MAX_WORKERS件を並列に取得する
 SLEEP_SEC = 0.5
+MAX_WORKERS = 4
 OUTPUT_CSV = "local/titles_extracted_google.csv"
 OUTPUT_RANKING_CSV = "local/a_ranking_google.csv"
 OUTPUT_RANKING_JSON = "local/a_ranking_google.json"
@@ -58,82 +43,106 @@ OUTPUT_RANKING_JSON = "local/a_ranking_google.json"
 def harvest_google_books(
     queries: list[str],
     sleep_sec: float = SLEEP_SEC,
+    max_workers: int = MAX_WORKERS,
 ) -> pd.DataFrame:
-    """各クエリからBookInfoを収集してDataFrameを返す"""
-    all_rows: list[dict] = []
-
-    for i, query in enumerate(queries, 1):
-        print(f"  [{i}/{len(queries)}] {query}", end=" ", flush=True)
-        books = fetch_all_books(query)
-        rows = [
-            {
-                "source": "google_books",
-                "title_raw": book.title,
-                "authors": ", ".join(book.authors),
-                "published_date": book.published_date,
-                "isbn": book.isbn,
-            }
-            for book in books
-        ]
-        all_rows.extend(rows)
-        print(f"→ {len(rows)}件")
-        if sleep_sec > 0:
-            time.sleep(sleep_sec)
-
-    df = pd.DataFrame(all_rows) if all_rows else pd.DataFrame(
-        columns=["source", "title_raw", "authors", "published_date", "isbn"]
+    """各クエリから書籍を並列に収集し、タイトルで重複を除いたDataFrameを返す
+
+    最大 max_workers 件のクエリを並列に取得する。
+    limiterをfetch_all_book_columnsに渡し、各クエリの2ページ目以降も含めて
+    全リクエストの開始間隔を sleep_sec 以上に保つ。
+    書籍ごとのオブジェクトや辞書は作らず、列ごとのリストに追記してからDataFrameにする。
+    """
+    limiter = RateLimiter(sleep_sec)
+
+    def fetch(query: str) -> dict[str, list]:
+        return fetch_all_book_columns(query, limiter=limiter)
+
+    titles: list[str] = []
+    authors: list[str] = []
+    published_dates: list[str | None] = []
+    isbns: list[str | None] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, (query, columns) in enumerate(
+            zip(queries, executor.map(fetch, queries)), 1
+        ):
+            titles.extend(columns["title"])
+            authors.extend(map(", ".join, columns["authors"]))
+            published_dates.extend(columns["published_date"])
+            isbns.extend(columns["isbn"])
+            print(f"  [{i}/{len(queries)}] {query} → {len(columns['title'])}件")
+
+    print(f"  生データ: {len(titles)}件")
+
+    rows = pd.DataFrame(
+        {
+            "source": "google_books",
+            "title_raw": titles,
+            "authors": authors,
+            "published_date": published_dates,
+            "isbn": isbns,
+        }
     )
-    print(f"  生データ: {len(df)}件")
-    return df
+    # タイトルのあるものを先頭から重複なしで残す
+    deduped = rows.loc[rows["title_raw"] != ""].drop_duplicates(
+        subset=["title_raw"], ignore_index=True
+    )
+    if len(deduped) < len(rows):
+        print(f"  重複除去: {len(rows)}件 → {len(deduped)}件")
+    return deduped
 
 
 # -----------------------------
 # 3) タイトルから a/b/c を抽出
 # -----------------------------
-def build_rank(df: pd.DataFrame):
+
+
+def build_rank(df: pd.DataFrame | list[dict]):
+    """タイトルからa, b, cを抽出し、抽出結果とランキングを返す"""
+    out = parse_titles(df)
+    return out, rank_titles(out)
+
+
+def parse_titles(df: pd.DataFrame | list[dict]) -> pd.DataFrame:
+    """タイトルからa, b, cを抽出し、cが取れた行だけを返す
+
+    タイトルの重複はharvest_google_booksで除いてあるので、ここでは除かない。
+    """
     if len(df) == 0:
-        empty_extracted = pd.DataFrame(
+        return pd.DataFrame(
             columns=["source", "title_raw", "c_value", "c_type", "a_raw", "b_raw"]
         )
-        empty_ranking = pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
-        return empty_extracted, empty_ranking
-
-    out = df.copy()
 
-    # 重複除去
-    original_count = len(out)
-    out = out.drop_duplicates(subset=["title_raw"]).reset_index(drop=True)
-    if len(out) < original_count:
-        print(f"  重複除去: {original_count}件 → {len(out)}件")
+    out = pd.DataFrame(df) if isinstance(df, list) else df.copy()
 
-    result = out["title_raw"].map(parse_ratio_title)
-    out["a_raw"] = result.map(lambda x: x[0])
-    out["b_raw"] = result.map(lambda x: x[1])
-    out["c_value"] = result.map(lambda x: x[2])
+    # タイトルを1回ずつ解析し、(a, b, c)のタプルをそのまま3列に展開する
+    # （「は」「が」「割」のどれかを含まないタイトルは、parse_ratio_titleが形態素解析をせずに除外する）
+    out["a_raw"], out["b_raw"], out["c_value"] = zip(
+        *(parse_ratio_title(title) for title in out["title_raw"])
+    )
     out["c_type"] = out["c_value"].map(lambda x: "wari" if x is not None else None)
 
-    matched_count = out["c_value"].notna().sum()
-    print(f"  パターンマッチ: {matched_count}件 / {len(out)}件")
-    out = out[out["c_value"].notna()].reset_index(drop=True)
+    mask_c = out["c_value"].notna()
+    print(f"  パターンマッチ: {mask_c.sum()}件 / {len(out)}件")
+    return out.loc[mask_c].reset_index(drop=True)
+
 
-    out_ab = out.dropna(subset=["a_raw"]).copy()
+def rank_titles(extracted: pd.DataFrame) -> pd.DataFrame:
+    """抽出済みのa, b, cからaごとのランキングを作成する"""
+    out_ab = extracted.loc[extracted["a_raw"].notna()]
     if len(out_ab) == 0:
-        return out, pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
+        return pd.DataFrame(columns=["a_raw", "c_sum", "n", "examples"])
 
     agg = (
         out_ab.groupby("a_raw")
-        .agg(c_sum=("c_value", "sum"), n=("c_value", "count"))
+        .agg(
+            c_sum=("c_value", "sum"),
+            n=("c_value", "count"),
+            examples=("title_raw", lambda s: " / ".join(s.iloc[:3])),
+        )
         .sort_values(["c_sum", "n"], ascending=[False, False])
         .reset_index()
     )
-    examples = (
-        out_ab.groupby("a_raw")["title_raw"]
-        .apply(lambda s: " / ".join(list(s.head(3))))
-        .reset_index()
-        .rename(columns={"title_raw": "examples"})
-    )
-    agg = agg.merge(examples, on="a_raw", how="left")
-    return out, agg
+    return agg
 
 
 def build_ranking_json(extracted: pd.DataFrame) -> dict:
@@ -158,24 +167,38 @@ def build_ranking_json(extracted: pd.DataFrame) -> dict:
             },
         }
 
-    rankings = []
-    for a_val in df.groupby("a_raw")["c_value"].sum().sort_values(ascending=False).index:
-        a_df = df[df["a_raw"] == a_val]
-        b_breakdown = []
-        for b_val in a_df.groupby("b_raw")["c_value"].sum().sort_values(ascending=False).index:
-            b_df = a_df[a_df["b_raw"] == b_val]
-            b_breakdown.append({
+    # (a, b)の組ごとに一度だけ集計し、aごとにbの内訳をまとめる
+    grouped = df.groupby(["a_raw", "b_raw"]).agg(
+        c_sum=("c_value", "sum"),
+        count=("c_value", "count"),
+        titles=("title_raw", list),
+    )
+    b_breakdowns: dict = {}
+    for (a_val, b_val), b_c_sum, b_count, titles in zip(
+        grouped.index, grouped["c_sum"], grouped["count"], grouped["titles"]
+    ):
+        b_breakdowns.setdefault(a_val, []).append(
+            {
                 "b": b_val,
-                "c_sum": float(b_df["c_value"].sum()),
-                "count": len(b_df),
-                "titles": b_df["title_raw"].tolist(),
-            })
-        rankings.append({
-            "a": a_val,
-            "c_sum": float(a_df["c_value"].sum()),
-            "count": len(a_df),
-            "b_breakdown": b_breakdown,
-        })
+                "c_sum": float(b_c_sum),
+                "count": int(b_count),
+                "titles": titles,
+            }
+        )
+
+    # aごと・bごとにc_sumの大きい順に並べる
+    rankings = []
+    for a_val, b_breakdown in b_breakdowns.items():
+        b_breakdown.sort(key=itemgetter("c_sum"), reverse=True)
+        rankings.append(
+            {
+                "a": a_val,
+                "c_sum": sum(item["c_sum"] for item in b_breakdown),
+                "count": sum(item["count"] for item in b_breakdown),
+                "b_breakdown": b_breakdown,
+            }
+        )
+    rankings.sort(key=itemgetter("c_sum"), reverse=True)
 
     return {
         "rankings": rankings,
@@ -214,24 +237,20 @@ def main():
         print(f"クエリ数: {len(queries)}")
         print("取得開始...")
 
-        df_titles = harvest_google_books(queries)
-        print(f"✓ {len(df_titles)}件のタイトルを取得")
+        harvested = harvest_google_books(queries)
+        print(f"✓ {len(harvested)}件のタイトルを取得")
 
-        extracted, _ = build_rank(df_titles)
+        extracted = parse_titles(harvested)
         extracted.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
         print(f"✓ {OUTPUT_CSV} を保存しました")
 
-    _, ranking = build_rank(
-        extracted[["source", "title_raw"]].copy()
-        if "source" in extracted.columns
-        else pd.DataFrame({"source": "google_books", "title_raw": extracted["title_raw"]})
-    )
+    # 抽出済みのa, b, cからランキングを作成（タイトルは再解析しない）
+    ranking = rank_titles(extracted)
 
     ranking.to_csv(OUTPUT_RANKING_CSV, index=False, encoding="utf-8-sig")
 
     ranking_json = build_ranking_json(extracted)
-    with open(OUTPUT_RANKING_JSON, "w", encoding="utf-8") as f:
-        json.dump(ranking_json, f, ensure_ascii=False, indent=2)
+    write_json(ranking_json, OUTPUT_RANKING_JSON)
 
     print("\nSaved:")
     print(f" - {OUTPUT_CSV}")
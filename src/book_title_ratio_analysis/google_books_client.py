@@ -5,17 +5,53 @@ APIキーは環境変数 GOOGLE_API_KEY から読み込むか、引数で渡す
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-_GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
+from book_title_ratio_analysis.rate_limiter import RateLimiter
+
+try:
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:  # orjsonは任意依存
+    orjson = None
 
+_GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
 
-@dataclass
+# レスポンスに含めるフィールド（部分レスポンス）。_parse_itemsで使う項目と総件数だけを受け取る
+_RESPONSE_FIELDS = (
+    "totalItems,"
+    "items/volumeInfo(title,authors,publishedDate,description,industryIdentifiers)"
+)
+
+# 1リクエストあたりのタイムアウト（秒）。応答のない接続でスレッドが止まり続けないようにする
+_TIMEOUT_SEC = 10
+
+# 全リクエストで接続を使い回すセッション（一時的なエラーは指数バックオフで再試行）
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        # 再試行し尽くした場合も最後のレスポンスを返し、raise_for_status()でHTTPErrorにする
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+@dataclass(slots=True)
 class BookInfo:
-    """Google Books APIから取得した書籍情報"""
+    """Google Books APIから取得した書籍情報（__slots__で1件あたりのメモリを抑える）"""
 
     title: str
     authors: list[str] = field(default_factory=list)
@@ -47,20 +83,24 @@ def search_books(
     params: dict[str, str | int] = {
         "q": query,
         "maxResults": max_results,
+        "fields": _RESPONSE_FIELDS,
     }
     if key:
         params["key"] = key
 
-    response = requests.get(_GOOGLE_BOOKS_API_URL, params=params)
+    response = _SESSION.get(
+        _GOOGLE_BOOKS_API_URL, params=params, timeout=_TIMEOUT_SEC
+    )
     response.raise_for_status()
 
-    data = response.json()
+    data = _decode_json(response)
     items = data.get("items", [])
     return _parse_items(items)
 
 
 _RATIO_QUERY = 'intitle:"が9割"'
 _PAGE_SIZE = 40
+_MAX_WORKERS = 4  # 2ページ目以降を並列に取得するときの最大同時リクエスト数
 _MAX_RESULTS = 300  # Google Books APIの内部上限は1000だが、実際の一クエリ最多取得件数は200程度なので300をデフォルトとする
 
 
@@ -68,17 +108,21 @@ def fetch_all_books(
     query: str,
     api_key: Optional[str] = None,
     max_results: int = _MAX_RESULTS,
+    limiter: Optional[RateLimiter] = None,
 ) -> list[BookInfo]:
     """任意のクエリで書籍を全件取得する
 
     ページネーションを使って全件を収集する。
+    1ページ目で総件数を取得し、2ページ目以降は最大 {_MAX_WORKERS} 件ずつ並列に取得する。
+    limiter を渡した場合は、並列に取得するページも含めて各リクエストの前に limiter.wait() で待機する。
     Google Books API は startIndex + maxResults が 1000 を超えるとエラーになるため、
     max_results の上限は 1000 まで。
 
     Args:
         query: 検索クエリ（intitle: 演算子なども使用可）
         api_key: Google API キー。Noneの場合は環境変数 GOOGLE_API_KEY を使用
-        max_results: 取得する最大件数（1　1000）。デフォルトは {_MAX_RESULTS}
+        max_results: 取得する最大件数（1〜1000）。デフォルトは {_MAX_RESULTS}
+        limiter: リクエストの開始間隔を保つRateLimiter。Noneの場合は待機しない
 
     Returns:
         BookInfoのリスト（最大 max_results 件）
@@ -87,38 +131,103 @@ def fetch_all_books(
         requests.HTTPError: APIがエラーレスポンスを返した場合
     """
     key = api_key if api_key is not None else os.environ.get("GOOGLE_API_KEY")
-    all_results: list[BookInfo] = []
-    start_index = 0
+    return _parse_items(_fetch_all_items(query, key, max_results, limiter))
 
-    while True:
-        remaining = max_results - start_index
-        page_size = min(_PAGE_SIZE, remaining)
 
-        params: dict[str, str | int] = {
-            "q": query,
-            "maxResults": page_size,
-            "startIndex": start_index,
-        }
-        if key:
-            params["key"] = key
+def fetch_all_book_columns(
+    query: str,
+    api_key: Optional[str] = None,
+    max_results: int = _MAX_RESULTS,
+    limiter: Optional[RateLimiter] = None,
+) -> dict[str, list]:
+    """任意のクエリで書籍を全件取得し、フィールドごとのリストを持つ列指向の辞書で返す
 
-        response = requests.get(_GOOGLE_BOOKS_API_URL, params=params)
-        response.raise_for_status()
+    fetch_all_booksと同じように取得するが、書籍ごとのBookInfoは作らない。
+    集計側で行ごとの辞書を作らずに、そのままDataFrameなどに渡せる。
 
-        data = response.json()
-        total_items = data.get("totalItems", 0)
-        items = data.get("items", [])
+    Args:
+        query: 検索クエリ（intitle: 演算子なども使用可）
+        api_key: Google API キー。Noneの場合は環境変数 GOOGLE_API_KEY を使用
+        max_results: 取得する最大件数（1〜1000）。デフォルトは {_MAX_RESULTS}
+        limiter: リクエストの開始間隔を保つRateLimiter。Noneの場合は待機しない
 
-        if not items:
-            break
+    Returns:
+        フィールド名（title, authors, published_date, description, isbn） -> 各書籍の値のリスト の辞書
 
-        all_results.extend(_parse_items(items))
-        start_index += len(items)
+    Raises:
+        requests.HTTPError: APIがエラーレスポンスを返した場合
+    """
+    key = api_key if api_key is not None else os.environ.get("GOOGLE_API_KEY")
+    return _parse_items_columnar(_fetch_all_items(query, key, max_results, limiter))
 
-        if start_index >= min(total_items, max_results):
-            break
 
-    return all_results[:max_results]
+def _fetch_all_items(
+    query: str,
+    key: Optional[str],
+    max_results: int,
+    limiter: Optional[RateLimiter],
+) -> list[dict]:
+    """検索結果を全ページ分取得し、ページ順に並べたitemsを返す"""
+    # 1ページ目で総件数を知る
+    data = _fetch_page(query, key, 0, min(_PAGE_SIZE, max_results), limiter)
+    items = data.get("items", [])
+    if not items:
+        return []
+
+    all_items = list(items)
+    limit = min(data.get("totalItems", 0), max_results)
+
+    # 2ページ目以降は互いに独立しているので、startIndexを_PAGE_SIZEずつずらしてまとめて並列に取得する
+    start_indices = range(_PAGE_SIZE, limit, _PAGE_SIZE)
+    if start_indices:
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            pages = executor.map(
+                lambda start: _fetch_page(
+                    query, key, start, min(_PAGE_SIZE, limit - start), limiter
+                ),
+                start_indices,
+            )
+            for page in pages:
+                page_items = page.get("items", [])
+                # 空のページ以降には結果がない
+                if not page_items:
+                    break
+                all_items.extend(page_items)
+
+    return all_items[:max_results]
+
+
+def _fetch_page(
+    query: str,
+    key: Optional[str],
+    start_index: int,
+    page_size: int,
+    limiter: Optional[RateLimiter] = None,
+) -> dict:
+    """検索結果の1ページ分を取得し、レスポンスのJSONを返す"""
+    params: dict[str, str | int] = {
+        "q": query,
+        "maxResults": page_size,
+        "startIndex": start_index,
+        "fields": _RESPONSE_FIELDS,
+    }
+    if key:
+        params["key"] = key
+
+    if limiter is not None:
+        limiter.wait()
+    response = _SESSION.get(
+        _GOOGLE_BOOKS_API_URL, params=params, timeout=_TIMEOUT_SEC
+    )
+    response.raise_for_status()
+    return _decode_json(response)
+
+
+def _decode_json(response: requests.Response) -> dict:
+    """レスポンス本文をJSONとして読み込む（orjsonがあればバイト列から直接読み込む）"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 
 def search_ratio_books(
@@ -145,25 +254,48 @@ def _parse_items(items: list[dict]) -> list[BookInfo]:
     results: list[BookInfo] = []
     for item in items:
         volume_info = item.get("volumeInfo", {})
-
-        isbn = None
-        for identifier in volume_info.get("industryIdentifiers", []):
-            if identifier.get("type") == "ISBN_13":
-                isbn = identifier.get("identifier")
-                break
-        if isbn is None:
-            for identifier in volume_info.get("industryIdentifiers", []):
-                if identifier.get("type") == "ISBN_10":
-                    isbn = identifier.get("identifier")
-                    break
-
         results.append(
             BookInfo(
                 title=volume_info.get("title", ""),
                 authors=volume_info.get("authors", []),
                 published_date=volume_info.get("publishedDate"),
                 description=volume_info.get("description"),
-                isbn=isbn,
+                isbn=_pick_isbn(volume_info),
             )
         )
     return results
+
+
+def _parse_items_columnar(items: list[dict]) -> dict[str, list]:
+    """APIレスポンスのitemsリストを、BookInfoを作らずにフィールドごとのリストに変換する"""
+    titles: list[str] = []
+    authors: list[list[str]] = []
+    published_dates: list[Optional[str]] = []
+    descriptions: list[Optional[str]] = []
+    isbns: list[Optional[str]] = []
+    for item in items:
+        volume_info = item.get("volumeInfo", {})
+        titles.append(volume_info.get("title", ""))
+        authors.append(volume_info.get("authors", []))
+        published_dates.append(volume_info.get("publishedDate"))
+        descriptions.append(volume_info.get("description"))
+        isbns.append(_pick_isbn(volume_info))
+    return {
+        "title": titles,
+        "authors": authors,
+        "published_date": published_dates,
+        "description": descriptions,
+        "isbn": isbns,
+    }
+
+
+def _pick_isbn(volume_info: dict) -> Optional[str]:
+    """ISBN_13を優先し、なければ最初のISBN_10を返す（1回の走査で探す）"""
+    isbn10 = None
+    for identifier in volume_info.get("industryIdentifiers", ()):
+        id_type = identifier.get("type")
+        if id_type == "ISBN_13":
+            return identifier.get("identifier")
+        if id_type == "ISBN_10" and isbn10 is None:
+            isbn10 = identifier.get("identifier")
+    return isbn10
@@ -0,0 +1,73 @@
+"""JSONファイルの書き出し
+
+orjsonがインストールされていればそれを使い、なければ標準のjsonモジュールで書き出す。
+どちらの場合も出力形式（インデント2、非ASCII文字はそのまま）は同じになる。
+"""
+
+import json
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:  # orjsonは任意依存
+    orjson = None
+
+
+def write_json(obj: Any, path: str | Path) -> None:
+    """オブジェクトをインデント付きのUTF-8 JSONとしてファイルに書き出す
+
+    Args:
+        obj: 書き出すオブジェクト
+        path: 出力ファイルのパス
+    """
+    if orjson is not None:
+        Path(path).write_bytes(
+            orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
+        return
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
+def _dumps_indented(obj: Any) -> str:
+    """オブジェクトをwrite_jsonと同じ形式（インデント2）の文字列にする"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def write_rankings_json(
+    path: str | Path,
+    rankings: Iterable[dict],
+    build_metadata: Callable[[int], dict],
+) -> int:
+    """ランキング項目を1件ずつ書き出し、{"rankings": [...], "metadata": {...}}形式のJSONを作る
+
+    ランキング全体をメモリ上に組み立てずに書き出せる。
+    出力はwrite_jsonで同じ内容の辞書を書き出した場合と同じになる。
+
+    Args:
+        path: 出力ファイルのパス
+        rankings: ランキング項目のイテラブル
+        build_metadata: 書き出した項目数を受け取り、metadataの辞書を返す関数
+
+    Returns:
+        書き出したランキング項目の数
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n  "rankings": [')
+        for entry in rankings:
+            f.write(",\n    " if count else "\n    ")
+            f.write(_dumps_indented(entry).replace("\n", "\n    "))
+            count += 1
+        f.write("\n  ],\n" if count else "],\n")
+
+        metadata = _dumps_indented(build_metadata(count)).replace("\n", "\n  ")
+        f.write(f'  "metadata": {metadata}\n}}')
+    return count
@@ -1,26 +1,24 @@
 """ネットワークグラフ作成機能"""
 
-from collections import defaultdict
+import json
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Optional
 
-from sudachipy import dictionary, tokenizer
+import pandas as pd
+from sudachipy import tokenizer
 
-
-# Sudachi辞書とトークナイザーの初期化
-_tokenizer_obj = None
-
-
-def _get_tokenizer() -> tokenizer.Tokenizer:
-    """トークナイザーのシングルトンインスタンスを取得"""
-    global _tokenizer_obj
-    if _tokenizer_obj is None:
-        _tokenizer_obj = dictionary.Dictionary().create()
-    return _tokenizer_obj
+from book_title_ratio_analysis.sudachi_tokenizer import get_tokenizer
 
 
+@lru_cache(maxsize=4096)
 def extract_last_noun(text: str) -> str:
     """
     文字列から末尾の名詞を抽出する
 
+    同じ文字列の結果はキャッシュされ、2回目以降は形態素解析しない
+
     Args:
         text: 抽出対象の文字列
 
@@ -30,41 +28,173 @@ def extract_last_noun(text: str) -> str:
     if not text:
         return text
 
-    tok = _get_tokenizer()
+    tok = get_tokenizer()
     tokens = tok.tokenize(text, tokenizer.Tokenizer.SplitMode.C)
 
-    # トークンをリストに変換してから後ろから名詞を探す
-    token_list = list(tokens)
-    for token in reversed(token_list):
-        pos = token.part_of_speech()[0]
-        if pos == "名詞":
+    # リストに変換せず、インデックスで後ろから名詞を探す
+    # （MorphemeListはreversed()に対応していないため、インデックスで参照する）
+    for i in range(len(tokens) - 1, -1, -1):
+        token = tokens[i]
+        if token.part_of_speech()[0] == "名詞":
             return token.surface()
 
     # 名詞が見つからない場合は元の文字列を返す
     return text
 
 
-def aggregate_normalized_data(data: list[dict]) -> dict[tuple[str, str], float]:
+def aggregate_normalized_data(
+    data: list[dict] | pd.DataFrame,
+) -> dict[tuple[str, str], float]:
     """
     データを正規化して集計する
 
+    (a, b)ごとの合計は、Pythonのループではなくpandasのgroupbyでまとめて計算する。
+    aやbが欠損した行も落とさずにNoneのキーとして集計し、
+    c_valueが欠損した行を含む(a, b)の合計は欠損値（NaN）になる。
+
     Args:
-        data: a_raw, b_raw, c_valueを含む辞書のリスト
+        data: a_raw, b_raw, c_valueを含む辞書のリスト、または同名の列を持つDataFrame
 
     Returns:
-        (正規化されたa, 正規化されたb) -> c_valueの合計 の辞書
+        (正規化されたa, 正規化されたb) -> c_valueの合計 の辞書（キーは最初に現れた順）
         ただし、正規化後にaとbが同じ場合は除外される
     """
-    aggregated = defaultdict(float)
+    df = pd.DataFrame(data, columns=["a_raw", "b_raw", "c_value"])
+
+    # 同じ文字列を何度も形態素解析しないよう、ユニークな文字列だけ先に正規化しておく
+    # （欠損値はDataFrameにするとNaNになるので正規化せず、NaNのまま残す）
+    unique_texts = set(df["a_raw"].dropna()) | set(df["b_raw"].dropna())
+    normalized = {text: extract_last_noun(text) for text in unique_texts}
+    a = df["a_raw"].map(normalized)
+    b = df["b_raw"].map(normalized)
+
+    # 正規化後にaとbが同じ場合は除外し、出現順を保ったまま(a, b)ごとに合計する
+    # 欠損したキーも落とさずに集計し（dropna=False）、aとbがともに欠損している行は「同じ」として除外する
+    keep = (a != b) & ~(a.isna() & b.isna())
+    sums = (
+        df["c_value"][keep]
+        .astype(float)
+        .groupby([a[keep], b[keep]], sort=False, dropna=False)
+        .sum(skipna=False)
+    )
+    # 欠損したキーはNaNになっているので、Noneに戻す
+    return {
+        (None if pd.isna(a_key) else a_key, None if pd.isna(b_key) else b_key): total
+        for (a_key, b_key), total in sums.items()
+    }
+
+
+# 正規化・集計結果のキャッシュ（create_network_graph.py / find_cycles.py / find_long_paths.py で共有）
+AGGREGATION_CACHE_PATH = Path("local/.cache/aggregated.json")
+
+# 正規化・集計の処理を変えたら上げる（古いキャッシュを使わないようにする）
+_AGGREGATION_VERSION = 2
+
+
+def _source_signature(csv_path: Path) -> dict[str, int]:
+    """キャッシュの有効性判定に使う元CSVの更新時刻とサイズを返す"""
+    stat = Path(csv_path).stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _normalizer_signature() -> dict[str, int | str | None]:
+    """キャッシュの有効性判定に使う正規化処理のバージョンとSudachi（本体・辞書）のバージョンを返す"""
+
+    def package_version(name: str) -> Optional[str]:
+        try:
+            return metadata.version(name)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "version": _AGGREGATION_VERSION,
+        "sudachipy": package_version("sudachipy"),
+        "sudachidict_core": package_version("sudachidict-core"),
+    }
+
+
+def load_aggregation_cache(
+    csv_path: Path, cache_path: Path
+) -> Optional[dict[tuple[str, str], float]]:
+    """
+    集計結果のキャッシュを読み込む
 
-    for row in data:
-        a_normalized = extract_last_noun(row["a_raw"])
-        b_normalized = extract_last_noun(row["b_raw"])
+    Args:
+        csv_path: 集計元のCSVファイルのパス
+        cache_path: キャッシュファイルのパス
 
-        # 正規化後にaとbが同じ場合は除外
-        if a_normalized == b_normalized:
-            continue
+    Returns:
+        (正規化されたa, 正規化されたb) -> c_valueの合計 の辞書
+        キャッシュが存在しないか、CSVがキャッシュ作成後に更新されている場合、
+        または正規化処理・Sudachiのバージョンが変わっている場合はNone
+    """
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return None
+
+    with open(cache_path, "r", encoding="utf-8") as f:
+        cache = json.load(f)
 
-        aggregated[(a_normalized, b_normalized)] += row["c_value"]
+    if cache.get("source") != _source_signature(csv_path):
+        return None
+    if cache.get("normalizer") != _normalizer_signature():
+        return None
 
-    return dict(aggregated)
+    return {(a, b): weight for a, b, weight in cache["edges"]}
+
+
+def save_aggregation_cache(
+    csv_path: Path,
+    cache_path: Path,
+    aggregated: dict[tuple[str, str], float],
+) -> None:
+    """
+    集計結果をキャッシュとして保存する
+
+    Args:
+        csv_path: 集計元のCSVファイルのパス
+        cache_path: キャッシュファイルのパス
+        aggregated: (正規化されたa, 正規化されたb) -> c_valueの合計 の辞書
+    """
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cache = {
+        "source": _source_signature(csv_path),
+        "normalizer": _normalizer_signature(),
+        "edges": [[a, b, weight] for (a, b), weight in aggregated.items()],
+    }
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def load_or_aggregate(
+    csv_path: Path, cache_path: Path = AGGREGATION_CACHE_PATH
+) -> dict[tuple[str, str], float]:
+    """
+    CSVを正規化・集計した結果を返す（有効なキャッシュがあればそれを使う）
+
+    キャッシュがない、または古い場合はCSVを読み込んで集計し、キャッシュを保存する。
+
+    Args:
+        csv_path: a_raw, b_raw, c_valueの列を持つCSVファイルのパス
+        cache_path: キャッシュファイルのパス
+
+    Returns:
+        (正規化されたa, 正規化されたb) -> c_valueの合計 の辞書
+    """
+    aggregated = load_aggregation_cache(csv_path, cache_path)
+    if aggregated is not None:
+        return aggregated
+
+    # 空欄は欠損値ではなく空文字列として読み込む
+    data = pd.read_csv(
+        csv_path,
+        encoding="utf-8-sig",
+        usecols=["a_raw", "b_raw", "c_value"],
+        dtype={"a_raw": "str", "b_raw": "str", "c_value": "float64"},
+        keep_default_na=False,
+    )
+    aggregated = aggregate_normalized_data(data)
+    save_aggregation_cache(csv_path, cache_path, aggregated)
+    return aggregated
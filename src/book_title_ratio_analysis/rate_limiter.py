@@ -0,0 +1,31 @@
+"""スレッド間で共有するリクエスト間隔の制御
+
+複数スレッドから並列にリクエストを送る場合でも、
+リクエストの開始間隔が指定秒数以上になるように待機する。
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """リクエストの開始間隔を一定以上に保つ（スレッドセーフ）
+
+    Args:
+        interval: リクエストの最小開始間隔（秒）
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self) -> None:
+        """次のリクエストを開始してよい時刻まで待機する"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self._interval
+        # ロックの外で待機し、他のスレッドが次の枠を予約できるようにする
+        if start > now:
+            time.sleep(start - now)
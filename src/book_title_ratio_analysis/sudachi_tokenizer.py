@@ -0,0 +1,26 @@
+"""パッケージ内で共有するSudachiトークナイザー
+
+Sudachiの辞書は読み込みが重く、メモリも多く使うため、
+title_parserとnetwork_graph（およびスクリプト）で同じ辞書とトークナイザーを1つだけ使い回す。
+"""
+
+from sudachipy import dictionary, tokenizer
+
+_dictionary_obj = None
+_tokenizer_obj = None
+
+
+def get_dictionary() -> dictionary.Dictionary:
+    """共有する辞書を取得する（初回呼び出し時に読み込む）"""
+    global _dictionary_obj
+    if _dictionary_obj is None:
+        _dictionary_obj = dictionary.Dictionary()
+    return _dictionary_obj
+
+
+def get_tokenizer() -> tokenizer.Tokenizer:
+    """共有するトークナイザーを取得する（初回呼び出し時に辞書を読み込む）"""
+    global _tokenizer_obj
+    if _tokenizer_obj is None:
+        _tokenizer_obj = get_dictionary().create()
+    return _tokenizer_obj
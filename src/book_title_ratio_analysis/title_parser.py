@@ -5,50 +5,53 @@ cは割の桁数（1-10）として返される（例: 9割 -> 9、10割 -> 10
 """
 
 import re
+from functools import lru_cache
 from typing import Optional
 from sudachipy import tokenizer
-from sudachipy import dictionary
-
-
-# Sudachi Tokenizerの初期化（Cモード: 長単位）
-_TOKENIZER_OBJ = dictionary.Dictionary().create()
-
-# 漢数字の変換マップ（一桁のみ、10は漢数字として扱わない）
-_KANJI_NUM = {
-    "一": 1,
-    "二": 2,
-    "三": 3,
-    "四": 4,
-    "五": 5,
-    "六": 6,
-    "七": 7,
-    "八": 8,
-    "九": 9,
-}
-
-# 全角数字の変換マップ
-_FULLWIDTH_NUM = {
-    "１": 1,
-    "２": 2,
-    "３": 3,
-    "４": 4,
-    "５": 5,
-    "６": 6,
-    "７": 7,
-    "８": 8,
-    "９": 9,
-    "１０": 10,
-}
+
+from book_title_ratio_analysis.sudachi_tokenizer import get_tokenizer
+
+try:
+    import re2 as _pattern_backend  # pyright: ignore[reportMissingImports]
+except ImportError:  # re2は任意依存
+    _pattern_backend = re
+
+
+# パースできなかった場合の戻り値
+NO_MATCH: tuple[None, None, None] = (None, None, None)
+
+# 漢数字（一桁のみ、10は漢数字として扱わない）と全角数字を半角数字に置き換える変換表
+_DIGIT_TABLE = str.maketrans("一二三四五六七八九１２３４５６７８９０", "1234567891234567890")
 
 # 「aはbがc割」パターン
 # c割の部分は半角数字1-10、全角数字１-１０、漢数字一-九を許可
 # 後ろに余分な文字列が続くことを許容する
-_PATTERN = re.compile(
-    r"(?P<a>.+?)は(?P<b>.+?)が(?P<c>(?:10|１０|[1-9１-９])\s*割|[一二三四五六七八九]割)",
-    re.MULTILINE,
+# RE2（google-re2）がインストールされていれば、バックトラックしないRE2で照合する
+# （RE2の\sはASCIIの空白のみなので、全角スペースは明示的に含める）
+_PATTERN = _pattern_backend.compile(
+    r"(?P<a>.+?)は(?P<b>.+?)が(?P<c>(?:10|１０|[1-9１-９])[\s　]*割|[一二三四五六七八九]割)"
+)
+
+# _PATTERNのマッチの末尾になりうる「がc割」
+# 標準のreはバックトラックするため、最後の「がc割」より後ろを照合範囲から外し、
+# 「がc割」のないセグメントでは_PATTERNを使わない（長いタイトルで照合時間が爆発しないようにする）
+_RATIO_TAIL_RE = re.compile(
+    r"が(?:(?:10|１０|[1-9１-９])[\s　]*割|[一二三四五六七八九]割)"
 )
 
+# 先頭の連体修飾句（「漫画で〜る」「まんがで〜る」）と、それに続く並列句（「〜も〜も」）
+# 両方を省略可能にして1つのパターンにまとめ、1回の置換で順に除去する
+_MODIFIER_RE = re.compile(r"^(?:(?:漫画|まんが)で.+?る)?(?:.+?も.+?も)?")
+
+# 括弧類（「」『』【】()（）[]）とクォートを削除する変換表
+_BRACKETS_TABLE = str.maketrans("", "", "「」『』【】()（）[]\"'")
 
+# 半角数字に置き換えた後の「c割」のc -> 割の桁数（正規表現を使わず、辞書を引くだけで求める）
+_C_VALUES = {str(value): value for value in range(1, 11)}
+
+
+# 大量のタイトルを処理しても際限なくメモリを使わないよう、キャッシュ件数に上限を設ける
+@lru_cache(maxsize=2048)
 def parse_ratio_title(
     title: Optional[str],
 ) -> tuple[Optional[str], Optional[str], Optional[int]]:
@@ -60,6 +63,7 @@ def parse_ratio_title(
     Returns:
         (a, b, c)のタプル。aはタイトルの主語、bは述語、cは割の桁数（1-10）
         パースできない場合は(None, None, None)を返す
+        同じタイトルの結果は直近2048件までキャッシュされ、2回目以降は解析しない
 
     Examples:
         >>> parse_ratio_title("人は見た目が9割")
@@ -72,23 +76,34 @@ def parse_ratio_title(
         (None, None, None)
     """
     if not title:
-        return None, None, None
+        return NO_MATCH
 
-    # コロン（全角・半角）で分割
-    segments = re.split(r"[：:]", title)
+    # 「は」「が」「割」のどれかを含まないタイトルはマッチしえないので、正規表現を使わずに除外する
+    if "割" not in title or "が" not in title or "は" not in title:
+        return NO_MATCH
+
+    # コロン（全角・半角）で分割（全角コロンを半角にそろえ、正規表現を使わずに分割する）
+    segments = title.replace("：", ":").split(":")
 
     # 後ろのセグメントから優先的に検査
     for segment in reversed(segments):
         # 前後の空白を除去
         segment = segment.strip()
 
-        # パターンにマッチするか試す（複数マッチする場合は最後のマッチを使う）
-        matches = list(_PATTERN.finditer(segment))
-        if not matches:
+        # マッチは最後の「がc割」までに収まるので、その位置までを照合範囲にする
+        end = 0
+        for tail in _RATIO_TAIL_RE.finditer(segment):
+            end = tail.end()
+        if not end:
             continue
 
-        # 最後のマッチを使用
-        match = matches[-1]
+        # パターンにマッチするか試す（複数マッチする場合は最後のマッチを使う）
+        # マッチのリストは作らず、最後のマッチだけを保持する
+        match = None
+        for match in _PATTERN.finditer(segment, 0, end):
+            pass
+        if match is None:
+            continue
 
         a = match.group("a").strip()
         b = match.group("b").strip()
@@ -120,7 +135,7 @@ def parse_ratio_title(
 
         return a, b, c_value
 
-    return None, None, None
+    return NO_MATCH
 
 
 def _remove_modifier_phrases(text: str) -> str:
@@ -135,21 +150,19 @@ def _remove_modifier_phrases(text: str) -> str:
     Returns:
         連体修飾句を削除したテキスト
     """
-    # 「漫画で〜る」「まんがで〜る」のようなパターンを除去
-    text = re.sub(r"^(漫画|まんが)で.+?る", "", text)
-
-    # 「〜も〜も」のような並列句を除去（複数の「も」がある場合）
+    # 「漫画で〜る」「まんがで〜る」のようなパターンと、
+    # 「〜も〜も」のような並列句（複数の「も」がある場合）をまとめて除去
     # 例: 「日本も世界もマスコミ」→「マスコミ」
-    text = re.sub(r"^.+?も.+?も", "", text)
-
-    return text.strip()
+    return _MODIFIER_RE.sub("", text, count=1).strip()
 
 
+@lru_cache(maxsize=4096)
 def _extract_last_noun_with_morphology(text: str) -> Optional[str]:
     """形態素解析を使って「は」に隣接する名詞句を抽出する
 
     sudachipyのCモード（長単位）を使用して、テキストの末尾が名詞で終わっている場合、
     連続する名詞を結合して返す。末尾が名詞でない場合はNoneを返す。
+    「人」「会社」のように多くのタイトルで共通するaは、結果をキャッシュして再解析しない。
 
     Args:
         text: 処理するテキスト
@@ -169,7 +182,7 @@ def _extract_last_noun_with_morphology(text: str) -> Optional[str]:
         return None
 
     # Cモード（長単位）で形態素解析
-    morphemes = _TOKENIZER_OBJ.tokenize(text, tokenizer.Tokenizer.SplitMode.C)
+    morphemes = get_tokenizer().tokenize(text, tokenizer.Tokenizer.SplitMode.C)
     morpheme_list = list(morphemes)
 
     if not morpheme_list:
@@ -203,11 +216,8 @@ def _remove_brackets(text: str) -> str:
     Returns:
         括弧を削除したテキスト
     """
-    # 「」『』【】()（）などを削除
-    text = re.sub(r"[「」『』【】()（）\[\]]", "", text)
-    # ダブルクォート・シングルクォートを削除
-    text = re.sub(r'["\']', "", text)
-    return text
+    # 「」『』【】()（）などの括弧とクォートを、正規表現を使わずにまとめて削除
+    return text.translate(_BRACKETS_TABLE)
 
 
 def _extract_c_value(c_raw: str) -> Optional[int]:
@@ -219,19 +229,5 @@ def _extract_c_value(c_raw: str) -> Optional[int]:
     Returns:
         割の桁数（1-10）。抽出できない場合はNone
     """
-    # 半角数字パターン（10および1-9）
-    m = re.search(r"(10|[1-9])\s*割", c_raw)
-    if m:
-        return int(m.group(1))
-
-    # 全角数字パターン（１０および１-９）
-    m = re.search(r"(１０|[１-９])\s*割", c_raw)
-    if m:
-        return _FULLWIDTH_NUM[m.group(1)]
-
-    # 漢数字パターン（一-九のみ）
-    m = re.search(r"([一二三四五六七八九])割", c_raw)
-    if m:
-        return _KANJI_NUM[m.group(1)]
-
-    return None
+    # 末尾の「割」と空白を除き、全角数字・漢数字を半角数字にそろえてから対応表を引く
+    return _C_VALUES.get(c_raw.removesuffix("割").rstrip().translate(_DIGIT_TABLE))
@@ -0,0 +1,29 @@
+"""テスト間で共有するフィクスチャ"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+# 実データのタイトルと期待するa, b, c（パースできないものはすべてnull）
+_GOLDEN_PATH = Path(__file__).parent / "data" / "ratio_titles.jsonl"
+
+
+def _load_golden() -> list[dict]:
+    """実データのテストケースを読み込む"""
+    with open(_GOLDEN_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """引数golden_caseを取るテストを、実データのテストケースごとにパラメータ化する"""
+    if "golden_case" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "golden_case", _load_golden(), ids=lambda case: case["title"][:20]
+        )
+
+
+@pytest.fixture(scope="session")
+def golden_cases() -> list[dict]:
+    """実データのテストケースをまとめて返す"""
+    return _load_golden()
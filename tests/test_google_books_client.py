@@ -1,10 +1,20 @@
 """Google Books APIクライアントのテスト"""
 
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, call, patch
 
 import pytest
+import requests
 
-from book_title_ratio_analysis.google_books_client import search_books, search_ratio_books, fetch_all_books, BookInfo
+from book_title_ratio_analysis.google_books_client import search_books, search_ratio_books, fetch_all_books, fetch_all_book_columns
+
+
+@pytest.fixture(autouse=True)
+def _use_stdlib_json():
+    """モックのresponse.json()を使うため、既定ではorjsonを使わない"""
+    with patch("book_title_ratio_analysis.google_books_client.orjson", None):
+        yield
 
 
 class TestSearchBooks:
@@ -28,7 +38,7 @@ class TestSearchBooks:
             ],
         }
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = search_books("人は見た目が9割", api_key="test_key")
 
@@ -44,7 +54,7 @@ class TestSearchBooks:
         mock_response.raise_for_status.return_value = None
         mock_response.json.return_value = {"totalItems": 0}
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = search_books("存在しない書籍タイトルXYZ", api_key="test_key")
 
@@ -64,7 +74,7 @@ class TestSearchBooks:
             ],
         }
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = search_books("著者不明の本", api_key="test_key")
 
@@ -75,12 +85,45 @@ class TestSearchBooks:
         assert results[0].description is None
         assert results[0].published_date is None
 
+    def test_正常系_ISBN_13を優先しなければISBN_10を使う(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            "totalItems": 2,
+            "items": [
+                {
+                    "volumeInfo": {
+                        "title": "両方あり",
+                        "industryIdentifiers": [
+                            {"type": "ISBN_10", "identifier": "4106100690"},
+                            {"type": "ISBN_13", "identifier": "9784106100697"},
+                        ],
+                    }
+                },
+                {
+                    "volumeInfo": {
+                        "title": "ISBN_10のみ",
+                        "industryIdentifiers": [
+                            {"type": "OTHER", "identifier": "OCLC:1"},
+                            {"type": "ISBN_10", "identifier": "4106100690"},
+                        ],
+                    }
+                },
+            ],
+        }
+
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
+            mock_get.return_value = mock_response
+            results = search_books("テスト", api_key="test_key")
+
+        assert [book.isbn for book in results] == ["9784106100697", "4106100690"]
+
     def test_正常系_api_keyがNoneかつ環境変数未設定ならkeyなしでリクエストできる(self):
         mock_response = MagicMock()
         mock_response.raise_for_status.return_value = None
         mock_response.json.return_value = {"totalItems": 0}
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get, \
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get, \
              patch.dict("os.environ", {}, clear=True):
             mock_get.return_value = mock_response
             results = search_books("テスト", api_key=None)
@@ -95,7 +138,7 @@ class TestSearchBooks:
         mock_response = MagicMock()
         mock_response.raise_for_status.side_effect = req.HTTPError("404 Not Found")
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             with pytest.raises(req.HTTPError):
                 search_books("テスト", api_key="test_key")
@@ -105,13 +148,55 @@ class TestSearchBooks:
         mock_response.raise_for_status.return_value = None
         mock_response.json.return_value = {"totalItems": 0}
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             search_books("テスト", api_key="test_key", max_results=5)
 
         call_kwargs = mock_get.call_args
         assert call_kwargs.kwargs["params"]["maxResults"] == 5
 
+    def test_正常系_必要なフィールドだけをリクエストする(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"totalItems": 0}
+
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
+            mock_get.return_value = mock_response
+            search_books("テスト", api_key="test_key")
+
+        fields = mock_get.call_args.kwargs["params"]["fields"]
+        assert fields.startswith("totalItems,")
+        assert "items/volumeInfo(" in fields
+
+    def test_正常系_タイムアウトを指定してリクエストする(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"totalItems": 0}
+
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
+            mock_get.return_value = mock_response
+            search_books("テスト", api_key="test_key")
+
+        assert mock_get.call_args.kwargs["timeout"] == 10
+
+    def test_正常系_orjsonでレスポンス本文を読み込める(self):
+        orjson = pytest.importorskip("orjson")
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.content = orjson.dumps(
+            {"totalItems": 1, "items": [{"volumeInfo": {"title": "人は見た目が9割"}}]}
+        )
+
+        with (
+            patch("book_title_ratio_analysis.google_books_client.orjson", orjson),
+            patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get,
+        ):
+            mock_get.return_value = mock_response
+            results = search_books("人は見た目が9割", api_key="test_key")
+
+        assert [book.title for book in results] == ["人は見た目が9割"]
+        mock_response.json.assert_not_called()
+
 
 class TestSearchRatioBooks:
     def test_正常系_intitleが9割クエリで書籍を取得できる(self):
@@ -125,7 +210,7 @@ class TestSearchRatioBooks:
             ],
         }
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = search_ratio_books(api_key="test_key")
 
@@ -150,7 +235,7 @@ class TestSearchRatioBooks:
                 }
             return mock
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get", side_effect=side_effect) as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect) as mock_get:
             results = search_ratio_books(api_key="test_key")
 
         assert len(results) == 45
@@ -164,7 +249,7 @@ class TestSearchRatioBooks:
         mock_response.raise_for_status.return_value = None
         mock_response.json.return_value = {"totalItems": 0}
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = search_ratio_books(api_key="test_key")
 
@@ -177,7 +262,7 @@ class TestSearchRatioBooks:
         mock_response = MagicMock()
         mock_response.raise_for_status.side_effect = req.HTTPError("403 Forbidden")
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             with pytest.raises(req.HTTPError):
                 search_ratio_books(api_key="test_key")
@@ -193,7 +278,7 @@ class TestSearchRatioBooks:
             }
             return mock
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get", side_effect=side_effect):
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect):
             results = search_ratio_books(api_key="test_key")
 
         from book_title_ratio_analysis.google_books_client import _MAX_RESULTS
@@ -209,7 +294,7 @@ class TestFetchAllBooks:
             "items": [{"volumeInfo": {"title": "人は見た目が9割"}}],
         }
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = fetch_all_books('intitle:"が9割"', api_key="test_key")
 
@@ -234,7 +319,7 @@ class TestFetchAllBooks:
                 }
             return mock
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get", side_effect=side_effect) as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect) as mock_get:
             results = fetch_all_books('intitle:"が8割"', api_key="test_key")
 
         assert len(results) == 55
@@ -255,7 +340,7 @@ class TestFetchAllBooks:
             call_count += 1
             return mock
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get", side_effect=side_effect):
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect):
             results = fetch_all_books('intitle:"が9割"', api_key="test_key")
 
         from book_title_ratio_analysis.google_books_client import _MAX_RESULTS
@@ -272,7 +357,7 @@ class TestFetchAllBooks:
             }
             return mock
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get", side_effect=side_effect):
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect):
             results = fetch_all_books('intitle:"が9割"', api_key="test_key", max_results=80)
 
         assert len(results) == 80
@@ -282,8 +367,155 @@ class TestFetchAllBooks:
         mock_response.raise_for_status.return_value = None
         mock_response.json.return_value = {"totalItems": 0}
 
-        with patch("book_title_ratio_analysis.google_books_client.requests.get") as mock_get:
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get") as mock_get:
             mock_get.return_value = mock_response
             results = fetch_all_books('intitle:"が1割"', api_key="test_key")
 
         assert results == []
+
+    def test_正常系_2ページ目以降を並列に取得してもページ順に並べる(self):
+        def side_effect(url, **kwargs):
+            start = kwargs["params"]["startIndex"]
+            size = kwargs["params"]["maxResults"]
+            mock = MagicMock()
+            mock.raise_for_status.return_value = None
+            mock.json.return_value = {
+                "totalItems": 100,
+                "items": [{"volumeInfo": {"title": f"本{i}"}} for i in range(start, start + size)],
+            }
+            return mock
+
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect) as mock_get:
+            results = fetch_all_books('intitle:"が7割"', api_key="test_key")
+
+        assert [book.title for book in results] == [f"本{i}" for i in range(100)]
+        requested = sorted(
+            (c.kwargs["params"]["startIndex"], c.kwargs["params"]["maxResults"])
+            for c in mock_get.call_args_list
+        )
+        assert requested == [(0, 40), (40, 40), (80, 20)]
+
+    def test_正常系_limiterを渡すと全ページのリクエスト前に待機する(self):
+        def side_effect(url, **kwargs):
+            start = kwargs["params"]["startIndex"]
+            mock = MagicMock()
+            mock.raise_for_status.return_value = None
+            mock.json.return_value = {
+                "totalItems": 100,
+                "items": [{"volumeInfo": {"title": f"本{start + i}"}} for i in range(40)],
+            }
+            return mock
+
+        limiter = MagicMock()
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect) as mock_get:
+            fetch_all_books('intitle:"が7割"', api_key="test_key", limiter=limiter)
+
+        assert mock_get.call_count == 3
+        assert limiter.wait.call_count == 3
+
+
+class TestFetchAllBookColumns:
+    def test_正常系_BookInfoを作らずにフィールドごとのリストで返す(self):
+        def side_effect(url, **kwargs):
+            start = kwargs["params"]["startIndex"]
+            mock = MagicMock()
+            mock.raise_for_status.return_value = None
+            if start == 0:
+                items = [
+                    {
+                        "volumeInfo": {
+                            "title": "人は見た目が9割",
+                            "authors": ["竹内一郎"],
+                            "industryIdentifiers": [
+                                {"type": "ISBN_10", "identifier": "4106101378"},
+                                {"type": "ISBN_13", "identifier": "9784106101373"},
+                            ],
+                        }
+                    }
+                ] + [{"volumeInfo": {"title": f"本{i}"}} for i in range(1, 40)]
+            else:
+                items = [{"volumeInfo": {"title": "著者不明の本", "publishedDate": "2020"}}]
+            mock.json.return_value = {"totalItems": 41, "items": items}
+            return mock
+
+        with (
+            patch("book_title_ratio_analysis.google_books_client._SESSION.get", side_effect=side_effect),
+            patch("book_title_ratio_analysis.google_books_client.BookInfo") as mock_book_info,
+        ):
+            columns = fetch_all_book_columns('intitle:"が9割"', api_key="test_key")
+
+        mock_book_info.assert_not_called()
+        assert columns["title"][0] == "人は見た目が9割"
+        assert columns["title"][-1] == "著者不明の本"
+        assert len(columns["title"]) == 41
+        assert columns["authors"][0] == ["竹内一郎"]
+        assert columns["authors"][-1] == []
+        assert columns["isbn"][0] == "9784106101373"
+        assert columns["isbn"][-1] is None
+        assert columns["published_date"][-1] == "2020"
+        assert columns["description"] == [None] * 41
+
+    def test_正常系_fetch_all_booksと同じ内容を返す(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            "totalItems": 2,
+            "items": [
+                {"volumeInfo": {"title": "人は見た目が9割", "authors": ["竹内一郎"]}},
+                {"volumeInfo": {"title": "話し方が9割", "description": "説明"}},
+            ],
+        }
+
+        with patch("book_title_ratio_analysis.google_books_client._SESSION.get", return_value=mock_response):
+            books = fetch_all_books('intitle:"が9割"', api_key="test_key")
+            columns = fetch_all_book_columns('intitle:"が9割"', api_key="test_key")
+
+        assert columns == {
+            "title": [book.title for book in books],
+            "authors": [book.authors for book in books],
+            "published_date": [book.published_date for book in books],
+            "description": [book.description for book in books],
+            "isbn": [book.isbn for book in books],
+        }
+
+
+class TestSessionRetry:
+    def test_異常系_再試行し尽くした503はHTTPErrorになる(self):
+        """503が続く場合は再試行したうえで、RetryErrorではなくHTTPErrorを送出する"""
+        from book_title_ratio_analysis import google_books_client
+
+        request_count = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                nonlocal request_count
+                request_count += 1
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        # ローカルのHTTPサーバーにも本番と同じ再試行設定のアダプターを使う
+        adapter = google_books_client._SESSION.get_adapter("https://")
+        try:
+            with (
+                patch.dict(google_books_client._SESSION.adapters, {"http://": adapter}),
+                patch(
+                    "book_title_ratio_analysis.google_books_client._GOOGLE_BOOKS_API_URL",
+                    f"http://127.0.0.1:{server.server_port}/",
+                ),
+                patch("urllib3.util.retry.time.sleep"),
+            ):
+                with pytest.raises(requests.HTTPError):
+                    search_books("テスト", api_key="test_key")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # 最初のリクエスト + 再試行3回
+        assert request_count == 4
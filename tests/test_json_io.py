@@ -0,0 +1,66 @@
+"""JSON書き出し機能のテスト"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from book_title_ratio_analysis.json_io import write_json, write_rankings_json
+
+_SAMPLE = {
+    "rankings": [
+        {"a": "人", "c_sum": 18.0, "count": 2, "titles": ["人は見た目が9割"]},
+        {"a": "会社", "c_sum": 1.0, "count": 1, "titles": []},
+    ],
+    "metadata": {"total_titles": 3, "generated_at": "2026-01-01T00:00:00"},
+}
+
+
+class TestWriteJson:
+    def test_正常系_標準jsonでインデント付きで書き出す(self, tmp_path):
+        path = tmp_path / "out.json"
+        with patch("book_title_ratio_analysis.json_io.orjson", None):
+            write_json(_SAMPLE, path)
+
+        expected = json.dumps(_SAMPLE, ensure_ascii=False, indent=2)
+        assert path.read_text(encoding="utf-8") == expected
+
+    def test_正常系_orjsonでも標準jsonと同じ内容を書き出す(self, tmp_path):
+        pytest.importorskip("orjson")
+        path = tmp_path / "out.json"
+        write_json(_SAMPLE, path)
+
+        expected = json.dumps(_SAMPLE, ensure_ascii=False, indent=2)
+        assert path.read_text(encoding="utf-8") == expected
+
+
+class TestWriteRankingsJson:
+    def test_正常系_write_jsonと同じ内容を書き出す(self, tmp_path):
+        path = tmp_path / "out.json"
+        count = write_rankings_json(
+            path, iter(_SAMPLE["rankings"]), lambda n: _SAMPLE["metadata"]
+        )
+
+        expected = json.dumps(_SAMPLE, ensure_ascii=False, indent=2)
+        assert path.read_text(encoding="utf-8") == expected
+        assert count == 2
+
+    def test_正常系_標準jsonでも同じ内容を書き出す(self, tmp_path):
+        path = tmp_path / "out.json"
+        with patch("book_title_ratio_analysis.json_io.orjson", None):
+            write_rankings_json(
+                path, iter(_SAMPLE["rankings"]), lambda n: _SAMPLE["metadata"]
+            )
+
+        expected = json.dumps(_SAMPLE, ensure_ascii=False, indent=2)
+        assert path.read_text(encoding="utf-8") == expected
+
+    def test_エッジケース_項目がない場合は空配列になる(self, tmp_path):
+        path = tmp_path / "out.json"
+        count = write_rankings_json(path, iter([]), lambda n: {"total": n})
+
+        expected = json.dumps(
+            {"rankings": [], "metadata": {"total": 0}}, ensure_ascii=False, indent=2
+        )
+        assert path.read_text(encoding="utf-8") == expected
+        assert count == 0
@@ -0,0 +1,54 @@
+"""main_google_books.py のテスト（APIはモックする）"""
+
+import importlib.util
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from book_title_ratio_analysis.rate_limiter import RateLimiter
+
+_SCRIPT_PATH = Path(__file__).parent.parent / "main_google_books.py"
+
+
+def _load_script():
+    """リポジトリ直下のmain_google_books.pyをモジュールとして読み込む"""
+    spec = importlib.util.spec_from_file_location("main_google_books", _SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestHarvestGoogleBooks:
+    def test_正常系_複数ページのクエリでも全リクエストの前に待機する(self):
+        """各クエリの2ページ目以降のリクエストも、共有のRateLimiterで間隔を保つ"""
+        main_google_books = _load_script()
+
+        def side_effect(url, **kwargs):
+            params = kwargs["params"]
+            start = params["startIndex"]
+            mock = MagicMock()
+            mock.raise_for_status.return_value = None
+            mock.json.return_value = {
+                "totalItems": 100,
+                "items": [
+                    {"volumeInfo": {"title": f"{params['q']}の本{start + i}"}}
+                    for i in range(params["maxResults"])
+                ],
+            }
+            return mock
+
+        queries = ['intitle:"が8割"', 'intitle:"が9割"']
+        # モックのresponse.json()を使うため、orjsonは使わない
+        with (
+            patch("book_title_ratio_analysis.google_books_client.orjson", None),
+            patch(
+                "book_title_ratio_analysis.google_books_client._SESSION.get",
+                side_effect=side_effect,
+            ) as mock_get,
+            patch.object(RateLimiter, "wait", autospec=True) as mock_wait,
+        ):
+            harvested = main_google_books.harvest_google_books(queries, sleep_sec=0)
+
+        # 1クエリあたり3ページ（0, 40, 80）を取得し、そのすべての前に待機する
+        assert mock_get.call_count == 6
+        assert mock_wait.call_count == 6
+        assert len(harvested) == 200
@@ -1,9 +1,16 @@
 """ネットワークグラフ作成機能のテスト"""
 
+import math
+from unittest.mock import patch
+
+import pandas as pd
 import pytest
 from book_title_ratio_analysis.network_graph import (
     extract_last_noun,
     aggregate_normalized_data,
+    load_aggregation_cache,
+    load_or_aggregate,
+    save_aggregation_cache,
 )
 
 
@@ -37,6 +44,13 @@ class TestExtractLastNoun:
         """空文字列の場合、空文字列を返す"""
         assert extract_last_noun("") == ""
 
+    def test_正常系_同じ文字列はキャッシュから返す(self):
+        """同じ文字列を2回処理すると、2回目はキャッシュから同じ結果を返す"""
+        extract_last_noun.cache_clear()
+        assert extract_last_noun("住宅営業") == "営業"
+        assert extract_last_noun("住宅営業") == "営業"
+        assert extract_last_noun.cache_info().hits == 1
+
     def test_正常系_記号を含む場合(self):
         """記号を含む場合、適切に処理する"""
         assert extract_last_noun("テキトー") == "テキトー"
@@ -96,3 +110,128 @@ class TestAggregateNormalizedData:
         data = []
         result = aggregate_normalized_data(data)
         assert result == {}
+
+    def test_正常系_DataFrameを入力できる(self):
+        """DataFrameを渡した場合も辞書のリストと同じ結果になる"""
+        data = pd.DataFrame(
+            {
+                "a_raw": ["住宅営業", "営業", "営業"],
+                "b_raw": ["初回面談", "面談", "営業"],
+                "c_value": [9.0, 5.0, 3.0],
+            }
+        )
+        result = aggregate_normalized_data(data)
+        assert result == {("営業", "面談"): 14.0}
+
+    def test_正常系_大量データでも出現順に集計する(self):
+        """行数が多くても、(a, b)が最初に現れた順に合計を返す"""
+        data = [
+            {"a_raw": "会社", "b_raw": "人", "c_value": 1.0},
+            {"a_raw": "住宅営業", "b_raw": "初回面談", "c_value": 9.0},
+            {"a_raw": "営業", "b_raw": "営業", "c_value": 3.0},
+        ] * 200
+        result = aggregate_normalized_data(data)
+        assert list(result.items()) == [
+            (("会社", "人"), 200.0),
+            (("営業", "面談"), 1800.0),
+        ]
+
+    @pytest.mark.parametrize("repeat", [1, 200])
+    def test_正常系_欠損値を含んでも行数によらず同じ規則で集計する(self, repeat):
+        """欠損したキーはNoneとして集計し、c_valueの欠損は合計に伝わる（行数が少なくても多くても同じ）"""
+        data = [
+            {"a_raw": "住宅営業", "b_raw": "初回面談", "c_value": 9.0},
+            {"a_raw": None, "b_raw": "初回面談", "c_value": 3.0},
+            {"a_raw": "営業", "b_raw": None, "c_value": 2.0},
+            {"a_raw": None, "b_raw": None, "c_value": 1.0},
+            {"a_raw": "会社", "b_raw": "人", "c_value": float("nan")},
+        ] * repeat
+        result = aggregate_normalized_data(data)
+
+        assert list(result) == [
+            ("営業", "面談"),
+            (None, "面談"),
+            ("営業", None),
+            ("会社", "人"),
+        ]
+        assert result[("営業", "面談")] == 9.0 * repeat
+        assert result[(None, "面談")] == 3.0 * repeat
+        assert result[("営業", None)] == 2.0 * repeat
+        assert math.isnan(result[("会社", "人")])
+
+    def test_正常系_DataFrameの欠損値もNoneのキーとして集計する(self):
+        """DataFrameで欠損値がNaNになっていても、辞書のリストと同じ結果になる"""
+        data = [
+            {"a_raw": "住宅営業", "b_raw": "初回面談", "c_value": 9.0},
+            {"a_raw": None, "b_raw": "初回面談", "c_value": 3.0},
+        ]
+        assert aggregate_normalized_data(pd.DataFrame(data)) == aggregate_normalized_data(data)
+
+
+class TestAggregationCache:
+    """集計結果キャッシュのテスト"""
+
+    def test_正常系_保存したキャッシュを読み込める(self, tmp_path):
+        """保存した集計結果をそのまま読み込める"""
+        csv_path = tmp_path / "titles.csv"
+        csv_path.write_text("a_raw,b_raw,c_value\n営業,準備,9.0\n", encoding="utf-8")
+        cache_path = tmp_path / "cache" / "aggregated.json"
+        aggregated = {("営業", "準備"): 9.0, ("会社", "人"): 1.0}
+
+        save_aggregation_cache(csv_path, cache_path, aggregated)
+
+        assert load_aggregation_cache(csv_path, cache_path) == aggregated
+
+    def test_正常系_キャッシュがない場合はNone(self, tmp_path):
+        """キャッシュファイルが存在しない場合はNoneを返す"""
+        csv_path = tmp_path / "titles.csv"
+        csv_path.write_text("a_raw,b_raw,c_value\n", encoding="utf-8")
+
+        assert load_aggregation_cache(csv_path, tmp_path / "none.json") is None
+
+    def test_正常系_CSVが更新されたらNone(self, tmp_path):
+        """キャッシュ作成後にCSVが更新された場合はNoneを返す"""
+        csv_path = tmp_path / "titles.csv"
+        csv_path.write_text("a_raw,b_raw,c_value\n営業,準備,9.0\n", encoding="utf-8")
+        cache_path = tmp_path / "aggregated.json"
+        save_aggregation_cache(csv_path, cache_path, {("営業", "準備"): 9.0})
+
+        csv_path.write_text(
+            "a_raw,b_raw,c_value\n営業,準備,9.0\n会社,人,1.0\n", encoding="utf-8"
+        )
+
+        assert load_aggregation_cache(csv_path, cache_path) is None
+
+    def test_正常系_正規化処理のバージョンが変わったらNone(self, tmp_path):
+        """正規化処理のバージョンが変わった場合は、CSVが同じでもNoneを返す"""
+        csv_path = tmp_path / "titles.csv"
+        csv_path.write_text("a_raw,b_raw,c_value\n営業,準備,9.0\n", encoding="utf-8")
+        cache_path = tmp_path / "aggregated.json"
+        save_aggregation_cache(csv_path, cache_path, {("営業", "準備"): 9.0})
+
+        with patch(
+            "book_title_ratio_analysis.network_graph._AGGREGATION_VERSION", 999
+        ):
+            assert load_aggregation_cache(csv_path, cache_path) is None
+
+
+class TestLoadOrAggregate:
+    """キャッシュを使った集計関数のテスト"""
+
+    def test_正常系_初回は集計してキャッシュし2回目はキャッシュを使う(self, tmp_path):
+        """初回はCSVを集計してキャッシュを保存し、2回目は集計せずにキャッシュを返す"""
+        csv_path = tmp_path / "titles.csv"
+        csv_path.write_text(
+            "a_raw,b_raw,c_value\n住宅営業,初回面談,9.0\n営業,面談,5.0\n",
+            encoding="utf-8",
+        )
+        cache_path = tmp_path / "cache" / "aggregated.json"
+
+        first = load_or_aggregate(csv_path, cache_path)
+        with patch(
+            "book_title_ratio_analysis.network_graph.aggregate_normalized_data"
+        ) as mock_aggregate:
+            second = load_or_aggregate(csv_path, cache_path)
+
+        assert first == second == {("営業", "面談"): 14.0}
+        mock_aggregate.assert_not_called()
@@ -0,0 +1,31 @@
+"""リクエスト間隔制御のテスト"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from book_title_ratio_analysis.rate_limiter import RateLimiter
+
+
+class TestRateLimiter:
+    def test_正常系_最初の呼び出しは待機しない(self):
+        limiter = RateLimiter(1.0)
+
+        start = time.monotonic()
+        limiter.wait()
+
+        assert time.monotonic() - start < 0.5
+
+    def test_正常系_複数スレッドからの呼び出しでも間隔を空ける(self):
+        limiter = RateLimiter(0.05)
+        started: list[float] = []
+
+        def call(_):
+            limiter.wait()
+            started.append(time.monotonic())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(call, range(5)))
+
+        started.sort()
+        gaps = [b - a for a, b in zip(started, started[1:])]
+        assert all(gap >= 0.04 for gap in gaps)
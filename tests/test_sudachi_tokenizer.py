@@ -0,0 +1,13 @@
+"""共有Sudachiトークナイザーのテスト"""
+
+from book_title_ratio_analysis.sudachi_tokenizer import get_dictionary, get_tokenizer
+
+
+class TestGetTokenizer:
+    def test_正常系_何度呼んでも同じインスタンスを返す(self):
+        assert get_tokenizer() is get_tokenizer()
+
+
+class TestGetDictionary:
+    def test_正常系_何度呼んでも同じインスタンスを返す(self):
+        assert get_dictionary() is get_dictionary()
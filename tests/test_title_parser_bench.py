@@ -0,0 +1,39 @@
+"""「aはbがc割」形式のタイトルパーサーのベンチマーク
+
+pytest-benchmarkがインストールされている場合のみ実行する。
+基準値は .benchmarks/ にコミットしてあり、CIでは平均実行時間が10%以上悪化したら失敗させる
+（GCによるばらつきを除くため、基準値の保存・比較ともに --benchmark-disable-gc を付ける）:
+
+    uv run --python 3.12 pytest tests/test_title_parser_bench.py --benchmark-disable-gc \
+        --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+パーサーを高速化して基準値を更新する場合は、既存の基準値を削除してから保存し直す:
+
+    uv run --python 3.12 pytest tests/test_title_parser_bench.py --benchmark-disable-gc \
+        --benchmark-save=baseline
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from book_title_ratio_analysis.title_parser import (  # noqa: E402
+    _extract_last_noun_with_morphology,
+    parse_ratio_title,
+)
+
+
+class TestParseRatioTitleBenchmark:
+    def test_正常系_実データのタイトルをまとめてパースする(self, benchmark, golden_cases):
+        titles = [case["title"] for case in golden_cases]
+
+        def parse_all():
+            # キャッシュが効くと解析の時間を測れないので、毎回空にしてから解析する
+            parse_ratio_title.cache_clear()
+            _extract_last_noun_with_morphology.cache_clear()
+            return [parse_ratio_title(title) for title in titles]
+
+        # 初回は辞書の読み込みなどで遅いので、ウォームアップしてから測る
+        results = benchmark.pedantic(parse_all, rounds=100, warmup_rounds=5)
+
+        assert len(results) == len(titles)